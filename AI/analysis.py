@@ -0,0 +1,136 @@
+import queue
+import sqlite3
+import threading
+import time
+from AI.transposition import encode_move, decode_move
+
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_MIN_DEPTH = 5
+# Eviction trims the store to this fraction of its cap, so that it does
+# not run again after every write once the cap is reached.
+EVICT_TO = 0.9
+EVICT_INTERVAL = 1000
+
+SCHEMA = '''CREATE TABLE IF NOT EXISTS analysis (
+    key INTEGER PRIMARY KEY,
+    move INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    bound INTEGER NOT NULL,
+    written REAL NOT NULL)'''
+UPSERT = '''INSERT INTO analysis VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET move = excluded.move, score = excluded.score, depth = excluded.depth,
+    bound = excluded.bound, written = excluded.written
+    WHERE excluded.depth >= analysis.depth'''
+
+
+def to_signed(key):
+    # SQLite integers are signed 64-bit; Polyglot keys are unsigned.
+    return key - (1 << 64) if key >> 63 else key
+
+
+def to_unsigned(key):
+    return key & ((1 << 64) - 1)
+
+
+class AnalysisCache:
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, min_depth=DEFAULT_MIN_DEPTH):
+        self.path = path
+        self.max_entries = max_entries
+        self.min_depth = min_depth
+        self.lookups = 0
+        self.hits = 0
+        self.writes = 0
+        # Lookups come from the search thread, writes from a thread of
+        # their own with its own connection.
+        self.lock = threading.Lock()
+        self.connection = self.connect()
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(SCHEMA)
+        connection.commit()
+        return connection
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+
+    def lookup(self, key):
+        # (depth, score, bound, move) like a transposition-table probe.
+        with self.lock:
+            row = self.connection.execute('SELECT depth, score, bound, move FROM analysis WHERE key = ?',
+                                          (to_signed(key),)).fetchone()
+        self.lookups += 1
+        if row is None:
+            return None
+        self.hits += 1
+        depth, score, bound, move = row
+        return depth, score, bound, decode_move(move)
+
+    def seed(self, transposition_table):
+        # Copies the deepest entries into the table, as many as it has slots.
+        with self.lock:
+            rows = self.connection.execute('SELECT key, depth, score, bound, move FROM analysis ORDER BY depth DESC '
+                                           'LIMIT ?', (len(transposition_table.keys),)).fetchall()
+        # Shallowest first, so deeper entries win the depth-preferred slots.
+        for key, depth, score, bound, move in reversed(rows):
+            transposition_table.store(to_unsigned(key), depth, score, bound, decode_move(move))
+        return len(rows)
+
+    def store(self, key, depth, score, bound, move):
+        if depth < self.min_depth or move is None:
+            return
+        self.queue.put((to_signed(key), encode_move(move), int(score), depth, bound, time.time()))
+
+    def write_loop(self):
+        connection = self.connect()
+        since_eviction = 0
+        while True:
+            rows = [self.queue.get()]
+            while True:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = rows[-1] is None
+            rows = [row for row in rows if row is not None]
+            if rows:
+                connection.executemany(UPSERT, rows)
+                connection.commit()
+                self.writes += len(rows)
+                since_eviction += len(rows)
+            if since_eviction >= EVICT_INTERVAL or done and since_eviction:
+                self.evict(connection)
+                since_eviction = 0
+            for _ in range(len(rows) + done):
+                self.queue.task_done()
+            if done:
+                connection.close()
+                return
+
+    def evict(self, connection):
+        # Shallow results go first, then the oldest.
+        count = connection.execute('SELECT COUNT(*) FROM analysis').fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * EVICT_TO)
+        connection.execute('DELETE FROM analysis WHERE key IN '
+                           '(SELECT key FROM analysis ORDER BY depth, written LIMIT ?)', (excess,))
+        connection.commit()
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.writer is None:
+            return
+        self.queue.put(None)
+        self.writer.join()
+        self.writer = None
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,86 @@
+import mmap
+import os
+import random
+import struct
+import chess
+import chess.polyglot
+
+# key, move, weight, learn: big-endian, 16 bytes, sorted by key.
+ENTRY = struct.Struct('>QHHI')
+KEY = struct.Struct('>Q')
+PROMOTIONS = (None, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+
+
+def encode_move(board, move):
+    # Polyglot writes castling as the king taking its own rook.
+    to_square = move.to_square
+    if board.is_castling(move):
+        to_square = chess.square(7 if to_square > move.from_square else 0, chess.square_rank(move.from_square))
+    promotion = PROMOTIONS.index(move.promotion) if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+def decode_move(board, raw_move):
+    from_square = raw_move >> 6 & 63
+    to_square = raw_move & 63
+    promotion = raw_move >> 12 & 7
+    if board.piece_type_at(from_square) == chess.KING and board.color_at(to_square) == board.turn:
+        to_square = chess.square(6 if to_square > from_square else 2, chess.square_rank(from_square))
+    return chess.Move(from_square, to_square, PROMOTIONS[promotion] if promotion < len(PROMOTIONS) else None)
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // ENTRY.size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b''
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def key_at(self, index):
+        return KEY.unpack_from(self.data, index * ENTRY.size)[0]
+
+    def first_index(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def entries(self, board):
+        # (move, weight) for every legal book move of the position.
+        key = chess.polyglot.zobrist_hash(board)
+        index = self.first_index(key)
+        while index < self.count:
+            entry_key, raw_move, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            move = decode_move(board, raw_move)
+            if board.is_legal(move):
+                yield move, weight
+            index += 1
+
+    def choose(self, board, selection='weighted', rng=random):
+        entries = [(move, weight) for move, weight in self.entries(board) if weight or selection != 'weighted']
+        if not entries:
+            return None
+        if selection == 'best':
+            return max(entries, key=lambda entry: entry[1])[0]
+        return rng.choices([move for move, _ in entries], [weight for _, weight in entries])[0]
@@ -0,0 +1,205 @@
+import chess
+from AI.pawns import PawnTable, PAWN_KEYS, SHELTER_RANKS
+
+MG_VALUES = (0, 82, 337, 365, 477, 1025, 0)
+EG_VALUES = (0, 94, 281, 297, 512, 936, 0)
+PIECE_VALUES = tuple(max(mg, eg) for mg, eg in zip(MG_VALUES, EG_VALUES))
+PHASE_WEIGHTS = (0, 0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+# Piece-square tables as seen by white, written rank 8 first.
+PAWN_MG = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+)
+PAWN_EG = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     20,  20,  20,  20,  20,  20,  20,  20,
+     10,  10,  10,  10,  10,  10,  10,  10,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0,
+)
+KNIGHT = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+BISHOP = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+ROOK = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+)
+QUEEN = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+KING_MG = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+)
+KING_EG = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+MG_TABLES = (None, PAWN_MG, KNIGHT, BISHOP, ROOK, QUEEN, KING_MG)
+EG_TABLES = (None, PAWN_EG, KNIGHT, BISHOP, ROOK, QUEEN, KING_EG)
+
+
+def build_square_scores(values, tables):
+    # scores[color][piece_type][square], signed so that white is positive.
+    scores = {}
+    for color in chess.COLORS:
+        sign = 1 if color == chess.WHITE else -1
+        scores[color] = [None] + [
+            [sign * (values[piece_type] + tables[piece_type][square ^ 56 if color == chess.WHITE else square])
+             for square in chess.SQUARES]
+            for piece_type in chess.PIECE_TYPES
+        ]
+    return scores
+
+
+MG_SCORES = build_square_scores(MG_VALUES, MG_TABLES)
+EG_SCORES = build_square_scores(EG_VALUES, EG_TABLES)
+
+
+class Evaluator:
+    def __init__(self, board=None, pawn_table=None):
+        self.stack = []
+        self.pawn_table = pawn_table if pawn_table is not None else PawnTable()
+        self.reset(board or chess.Board())
+
+    def reset(self, board):
+        self.stack = []
+        self.mg = 0
+        self.eg = 0
+        self.phase = 0
+        # Pawn-only key and pawn sets, indexed by colour, for the pawn table.
+        self.pawn_key = 0
+        self.pawns = [0, 0]
+        self.kings = [None, None]
+        for square, piece in board.piece_map().items():
+            self.add(piece.color, piece.piece_type, square)
+
+    def remove(self, color, piece_type, square):
+        self.mg -= MG_SCORES[color][piece_type][square]
+        self.eg -= EG_SCORES[color][piece_type][square]
+        self.phase -= PHASE_WEIGHTS[piece_type]
+        if piece_type == chess.PAWN:
+            self.pawn_key ^= PAWN_KEYS[color][square]
+            self.pawns[color] ^= chess.BB_SQUARES[square]
+
+    def add(self, color, piece_type, square):
+        self.mg += MG_SCORES[color][piece_type][square]
+        self.eg += EG_SCORES[color][piece_type][square]
+        self.phase += PHASE_WEIGHTS[piece_type]
+        if piece_type == chess.PAWN:
+            self.pawn_key ^= PAWN_KEYS[color][square]
+            self.pawns[color] ^= chess.BB_SQUARES[square]
+        elif piece_type == chess.KING:
+            self.kings[color] = square
+
+    def push(self, board, move):
+        # Must be called before the move is pushed on the board.
+        self.stack.append((self.mg, self.eg, self.phase, self.pawn_key, self.pawns[0], self.pawns[1],
+                           self.kings[0], self.kings[1]))
+        if not move:
+            return
+        color = board.turn
+        piece_type = board.piece_type_at(move.from_square)
+
+        if board.is_castling(move):
+            rook_from = move.to_square if board.piece_type_at(move.to_square) == chess.ROOK else \
+                (chess.H1 if move.to_square > move.from_square else chess.A1) ^ (0 if color == chess.WHITE else 56)
+            kingside = rook_from > move.from_square
+            king_to = chess.square(6 if kingside else 2, chess.square_rank(move.from_square))
+            rook_to = chess.square(5 if kingside else 3, chess.square_rank(move.from_square))
+            self.remove(color, chess.KING, move.from_square)
+            self.remove(color, chess.ROOK, rook_from)
+            self.add(color, chess.KING, king_to)
+            self.add(color, chess.ROOK, rook_to)
+            return
+
+        if board.is_en_passant(move):
+            self.remove(not color, chess.PAWN, move.to_square + (-8 if color == chess.WHITE else 8))
+        else:
+            victim = board.piece_type_at(move.to_square)
+            if victim:
+                self.remove(not color, victim, move.to_square)
+
+        self.remove(color, piece_type, move.from_square)
+        self.add(color, move.promotion or piece_type, move.to_square)
+
+    def pop(self):
+        (self.mg, self.eg, self.phase, self.pawn_key, self.pawns[0], self.pawns[1],
+         self.kings[0], self.kings[1]) = self.stack.pop()
+
+    def pawn_score(self):
+        # Pawn structure and king shelter come from the pawn table: they
+        # change only when a pawn (or a king, for the shelter) moves.
+        table = self.pawn_table
+        index = table.entry(self.pawn_key, self.pawns[chess.WHITE], self.pawns[chess.BLACK])
+        mg = table.mg[index]
+        for color in chess.COLORS:
+            king = self.kings[color]
+            if king is None:
+                continue
+            rank = chess.square_rank(king) if color == chess.WHITE else 7 - chess.square_rank(king)
+            if rank < SHELTER_RANKS:
+                shelter = table.shelter(index, self.pawns[color], color, chess.square_file(king))
+                mg += shelter if color == chess.WHITE else -shelter
+        return mg, table.eg[index]
+
+    def score(self):
+        phase = min(self.phase, MAX_PHASE)
+        pawn_mg, pawn_eg = self.pawn_score()
+        total = (self.mg + pawn_mg) * phase + (self.eg + pawn_eg) * (MAX_PHASE - phase)
+        # Rounded toward zero, so that a position and its colour mirror score s and -s.
+        return int(total / MAX_PHASE)
@@ -1,55 +1,498 @@
+import time
 import chess
 import chess.engine
+import chess.polyglot
+from AI.transposition import TranspositionTable, EXACT, LOWER, UPPER, bound_type
+from AI.ordering import MoveOrderer
+from AI.stats import SearchStats
+from AI.see import see
+from AI.evaluation import Evaluator, PIECE_VALUES
+from AI.book import OpeningBook
+from AI.tablebase import Tablebases
+from AI.analysis import AnalysisCache
+
+DEFAULT_TT_SIZE_MB = 16
+DEFAULT_DEPTH = 6
+MAX_DEPTH = 64
+CHECK_INTERVAL = 256
+DELTA_MARGIN = 200
+TABLEBASE_WIN = 20000
+TABLEBASE_PIECES = 7
+INFINITY = float('inf')
+
+# Mates score MATE_SCORE less the plies to mate, tablebase wins a little
+# less; both are stored in the table relative to the node, not the root.
+MATE_SCORE = 30000
+DECISIVE_SCORE = TABLEBASE_WIN - 1000
+
+ASPIRATION_DEPTH = 4
+ASPIRATION_WINDOW = 40
+ASPIRATION_LIMIT = 640
+
+# Searches without a depth limit take a stored result at least this deep.
+CACHE_REPLY_DEPTH = 8
+
+# Selective search. Each technique can be switched off for comparison.
+PRUNING = ('null_move', 'late_move_reductions', 'futility', 'reverse_futility')
+NULL_MOVE_DEPTH = 3
+NULL_MOVE_REDUCTION = 2
+VERIFY_PHASE = 6
+LMR_DEPTH = 3
+LMR_MOVES = 3
+FUTILITY_MARGINS = (0, 150, 300)
+REVERSE_FUTILITY_DEPTH = 3
+REVERSE_FUTILITY_MARGIN = 120
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def score_to_table(score, ply):
+    if score >= DECISIVE_SCORE:
+        return score + ply
+    if score <= -DECISIVE_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    if score >= DECISIVE_SCORE:
+        return score - ply
+    if score <= -DECISIVE_SCORE:
+        return score + ply
+    return score
+
+
+def parse_pruning(text):
+    # "all", "none" or techniques joined by "+", as used by the tools.
+    if text == 'all':
+        return PRUNING
+    if text == 'none':
+        return ()
+    pruning = tuple(text.split('+'))
+    for name in pruning:
+        if name not in PRUNING:
+            raise ValueError(f"unknown pruning option {name}")
+    return pruning
 
 
 class Ai:
-    def __init__(self):
+    def __init__(self, tt_size_mb=DEFAULT_TT_SIZE_MB, book_path=None, book_selection='weighted',
+                 tablebase_path=None, pruning=PRUNING, cache_path=None):
         self.chess_board = chess.Board()
+        self.evaluator = Evaluator(self.chess_board)
+        self.transposition_table = TranspositionTable(tt_size_mb)
+        self.move_orderer = MoveOrderer()
+        self.stats = SearchStats()
+        self.principal_variation = []
+        self.best_move = None
+        self.root_ply = 0
+        self.deadline = None
+        self.node_limit = None
+        self.can_abort = False
+        self.stop_event = None
+        self.book = None
+        self.book_selection = book_selection
+        if book_path is not None:
+            self.load_book(book_path)
+        self.tablebases = None
+        if tablebase_path is not None:
+            self.load_tablebases(tablebase_path)
+        self.set_pruning(pruning)
+        self.analysis_cache = None
+        if cache_path is not None:
+            self.load_analysis_cache(cache_path)
+
+    def set_pruning(self, pruning):
+        self.null_move = 'null_move' in pruning
+        self.late_move_reductions = 'late_move_reductions' in pruning
+        self.futility = 'futility' in pruning
+        self.reverse_futility = 'reverse_futility' in pruning
+
+    def load_book(self, path):
+        if self.book is not None:
+            self.book.close()
+        self.book = OpeningBook(path)
+
+    def load_tablebases(self, path):
+        if self.tablebases is not None:
+            self.tablebases.close()
+        self.tablebases = Tablebases(path)
+
+    def load_analysis_cache(self, path):
+        if self.analysis_cache is not None:
+            self.analysis_cache.close()
+        self.analysis_cache = AnalysisCache(path)
+        self.analysis_cache.seed(self.transposition_table)
+
+    def close(self):
+        # Waits for pending analysis writes.
+        if self.analysis_cache is not None:
+            self.analysis_cache.close()
+            self.analysis_cache = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.tablebases is not None:
+            self.tablebases.close()
+            self.tablebases = None
+
+    def tablebase_score(self, ply):
+        if not self.tablebases or chess.popcount(self.chess_board.occupied) > TABLEBASE_PIECES:
+            return None
+        result = self.tablebases.probe(self.chess_board)
+        if result is None:
+            return None
+        self.stats.tablebase_hits += 1
+        wdl, plies = result
+        # Closer mates score higher, from the side to move's point of view.
+        return wdl * (TABLEBASE_WIN - ply - (plies or 0)) if wdl else 0
+
+    def cached_move(self, depth=None):
+        # A stored exact result at least as deep as the search asked for.
+        if self.analysis_cache is None:
+            return None
+        entry = self.analysis_cache.lookup(self.position_key())
+        if entry is None:
+            return None
+        stored_depth, _, bound, move = entry
+        required = depth if depth is not None else CACHE_REPLY_DEPTH
+        if bound != EXACT or stored_depth < required or not self.chess_board.is_legal(move):
+            return None
+        return move
+
+    def save_analysis(self):
+        # The root and principal variation entries go to the persistent cache.
+        board = self.chess_board.copy(stack=False)
+        for move in [None] + self.principal_variation:
+            if move is not None:
+                board.push(move)
+            key = chess.polyglot.zobrist_hash(board)
+            entry = self.transposition_table.probe(key, count=False)
+            if entry is None:
+                break
+            self.analysis_cache.store(key, *entry)
+
+    def book_move(self):
+        if self.book is None:
+            return None
+        return self.book.choose(self.chess_board, self.book_selection)
+
+    def push(self, move):
+        self.evaluator.push(self.chess_board, move)
+        self.chess_board.push(move)
+
+    def pop(self):
+        self.chess_board.pop()
+        self.evaluator.pop()
+
+    def position_key(self):
+        return chess.polyglot.zobrist_hash(self.chess_board)
 
-    def minimax(self, depth, alpha, beta, maximizing_player=False):
-        if depth == 0 or self.chess_board.is_game_over():
-            return self.evaluate()
-
-        if maximizing_player:
-            max_eval = float('-inf')
-            for move in self.chess_board.legal_moves:
-                self.chess_board.push(move)
-                eval = self.minimax(depth - 1, alpha, beta)
-                self.chess_board.pop()
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
+    def check_limits(self):
+        self.stats.nodes += 1
+        nodes = self.stats.nodes
+        if self.can_abort and self.node_limit is not None and nodes >= self.node_limit:
+            raise SearchAborted()
+        if nodes % CHECK_INTERVAL == 0:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchAborted()
+            if self.can_abort and self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchAborted()
+
+    def ordered_moves(self, ply, hash_move=None):
+        # While the current line still matches the previous iteration's
+        # principal variation, its next move takes the hash move's place.
+        pv = self.principal_variation
+        if ply < len(pv) and self.chess_board.move_stack[self.root_ply:] == pv[:ply]:
+            hash_move = pv[ply]
+        return self.move_orderer.order(self.chess_board, self.chess_board.legal_moves, hash_move, ply)
+
+    def negamax(self, depth, alpha, beta, ply=1, null_allowed=True):
+        # Scores are from the point of view of the side to move.
+        if depth <= 0:
+            return self.quiescence(alpha, beta, ply)
+        self.check_limits()
+        if ply > self.stats.seldepth:
+            self.stats.seldepth = ply
+        # Probed before the game-over test so that mates score as mates.
+        score = self.tablebase_score(ply)
+        if score is not None:
+            return score
+        board = self.chess_board
+        if board.is_game_over():
+            return -(MATE_SCORE - ply) if board.is_checkmate() else 0
+
+        pv_node = beta - alpha > 1
+        key = self.position_key()
+        entry = self.transposition_table.probe(key)
+        hash_move = entry[3] if entry is not None else None
+        if entry is not None and entry[0] >= depth:
+            _, score, bound, _ = entry
+            score = score_from_table(score, ply)
+            if bound == EXACT:
+                return score
+            if bound == LOWER:
+                alpha = max(alpha, score)
+            elif bound == UPPER:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+        window = (alpha, beta)
+
+        in_check = board.is_check()
+        futility_value = None
+        if not in_check and not pv_node:
+            static_eval = self.evaluate()
+            if self.reverse_futility and depth <= REVERSE_FUTILITY_DEPTH and \
+                    static_eval - REVERSE_FUTILITY_MARGIN * depth >= beta:
+                self.stats.reverse_futility_cutoffs += 1
+                return static_eval - REVERSE_FUTILITY_MARGIN * depth
+            if self.null_move and null_allowed and depth >= NULL_MOVE_DEPTH and static_eval >= beta:
+                score = self.null_move_search(depth, beta, ply)
+                if score is not None:
+                    return score
+            if self.futility and depth < len(FUTILITY_MARGINS) and static_eval + FUTILITY_MARGINS[depth] <= alpha:
+                futility_value = static_eval + FUTILITY_MARGINS[depth]
+
+        best_score = -INFINITY
+        best_move = None
+        for index, move in enumerate(self.ordered_moves(ply, hash_move)):
+            selective = index > 0 and not in_check and (
+                futility_value is not None or self.late_move_reductions and depth >= LMR_DEPTH and index >= LMR_MOVES)
+            quiet = selective and not board.is_capture(move) and not move.promotion and not board.gives_check(move)
+            # Near the leaves, quiet moves cannot lift a hopeless static
+            # score back to alpha.
+            if futility_value is not None and quiet:
+                self.stats.futility_prunes += 1
+                best_score = max(best_score, futility_value)
+                continue
+            self.push(move)
+            score = self.search_move(depth, alpha, beta, ply, index, quiet)
+            self.pop()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    self.record_cutoff(move, index, depth, ply)
                     break
-            return max_eval
+        self.transposition_table.store(key, depth, score_to_table(best_score, ply),
+                                       bound_type(best_score, *window), best_move)
+        return best_score
+
+    def search_move(self, depth, alpha, beta, ply, index, quiet):
+        # Principal variation search: the first move gets the full window,
+        # the rest a null window that only proves them worse, with a full
+        # re-search when one turns out better. Late quiet moves are tried
+        # shallower first.
+        if index == 0:
+            return -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+        if self.late_move_reductions and quiet and depth >= LMR_DEPTH and index >= LMR_MOVES:
+            reduction = 2 if depth >= 6 and index >= 2 * LMR_MOVES else 1
+            self.stats.reductions += 1
+            score = -self.negamax(depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+            if score <= alpha:
+                return score
+            self.stats.re_searches += 1
+        score = -self.negamax(depth - 1, -alpha - 1, -alpha, ply + 1)
+        if alpha < score < beta:
+            self.stats.pv_re_searches += 1
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+        return score
+
+    def null_move_search(self, depth, beta, ply):
+        # Passing the move: if the opponent still cannot get below beta, a
+        # real move would do at least as well. Not tried with only pawns
+        # left, where passing is often the only thing that would help.
+        board = self.chess_board
+        if not board.occupied_co[board.turn] & ~(board.pawns | board.kings):
+            return None
+        self.push(chess.Move.null())
+        score = -self.negamax(depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1, null_allowed=False)
+        self.pop()
+        if score < beta:
+            return None
+        # Zugzwang is likely once little material is left, so the cutoff
+        # must be confirmed by a reduced search of the real moves.
+        if self.evaluator.phase <= VERIFY_PHASE:
+            self.stats.null_move_verifications += 1
+            if self.negamax(depth - NULL_MOVE_REDUCTION, beta - 1, beta, ply, null_allowed=False) < beta:
+                return None
+        self.stats.null_move_cutoffs += 1
+        return beta
+
+    def capture_gain(self, move):
+        board = self.chess_board
+        victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+        gain = PIECE_VALUES[victim or 0]
+        if move.promotion:
+            gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+        return gain
+
+    def quiescence_moves(self, ply):
+        board = self.chess_board
+        if board.is_check():
+            return self.move_orderer.order(board, board.legal_moves, ply=ply), True
+        # Captures, and queen promotions that are not captures, without
+        # generating the quiet moves at all.
+        moves = list(board.generate_legal_captures())
+        moves.extend(move for move in board.generate_legal_moves(board.pawns & board.occupied_co[board.turn],
+                                                                   chess.BB_BACKRANKS & ~board.occupied)
+                     if move.promotion == chess.QUEEN)
+        return self.move_orderer.order(board, moves, ply=ply), False
+
+    def quiescence(self, alpha, beta, ply):
+        self.check_limits()
+        self.stats.quiescence_nodes += 1
+        if ply > self.stats.seldepth:
+            self.stats.seldepth = ply
+        score = self.tablebase_score(ply)
+        if score is not None:
+            return score
+        board = self.chess_board
+        moves, evasions = self.quiescence_moves(ply)
+        if evasions:
+            if not moves:
+                return -(MATE_SCORE - ply)
+            best_score = -INFINITY
         else:
-            min_eval = float('inf')
-            for move in self.chess_board.legal_moves:
-                self.chess_board.push(move)
-                eval = self.minimax(depth - 1, alpha, beta, True)
-                self.chess_board.pop()
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
+            # Standing pat: the side to move may decline every capture.
+            stand_pat = best_score = self.evaluate()
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+
+        for move in moves:
+            if not evasions:
+                if stand_pat + self.capture_gain(move) + DELTA_MARGIN <= alpha:
+                    continue
+                if see(board, move) < 0:
+                    continue
+            self.push(move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            self.pop()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def record_cutoff(self, move, index, depth, ply):
+        self.stats.record_cutoff(index)
+        self.move_orderer.record_cutoff(self.chess_board, move, depth, ply)
 
     def evaluate(self):
-        score = 0
-        for piece_type in chess.PIECE_TYPES:
-            score += len(self.chess_board.pieces(piece_type, chess.WHITE)) - len(self.chess_board.pieces(piece_type, chess.BLACK))
-        return score
+        score = self.evaluator.score()
+        return score if self.chess_board.turn == chess.WHITE else -score
 
-    def get_best_move(self, depth):
+    def search_root(self, depth, alpha=-INFINITY, beta=INFINITY):
+        window = (alpha, beta)
         best_move = None
-        max_eval = float('-inf')
-        alpha = float('-inf')
-        beta = float('inf')
-        for move in self.chess_board.legal_moves:
-            self.chess_board.push(move)
-            eval = self.minimax(depth - 1, alpha, beta)
-            self.chess_board.pop()
-            if eval > max_eval:
-                max_eval = eval
+        best_score = -INFINITY
+        entry = self.transposition_table.probe(self.position_key())
+        for index, move in enumerate(self.ordered_moves(0, entry[3] if entry is not None else None)):
+            self.push(move)
+            score = self.search_move(depth, alpha, beta, 0, index, False)
+            self.pop()
+            if score > best_score:
+                best_score = score
                 best_move = move
-            alpha = max(alpha, eval)
-        return best_move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        if best_move is not None:
+            self.transposition_table.store(self.position_key(), depth, best_score,
+                                           bound_type(best_score, *window), best_move)
+        return best_move, best_score
+
+    def aspiration_search(self, depth, previous_score):
+        # A narrow window around the previous iteration's score cuts more;
+        # when the score falls outside it, that side is widened and the
+        # iteration searched again.
+        if previous_score is None or depth < ASPIRATION_DEPTH or abs(previous_score) >= DECISIVE_SCORE:
+            return self.search_root(depth)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = previous_score - delta, previous_score + delta
+        while True:
+            move, score = self.search_root(depth, alpha, beta)
+            if score <= alpha:
+                self.stats.aspiration_fail_lows += 1
+                alpha = score - delta if delta < ASPIRATION_LIMIT else -INFINITY
+            elif score >= beta:
+                self.stats.aspiration_fail_highs += 1
+                beta = score + delta if delta < ASPIRATION_LIMIT else INFINITY
+            else:
+                return move, score
+            delta *= 2
+
+    def extract_pv(self, depth):
+        pv = []
+        board = self.chess_board.copy(stack=False)
+        while len(pv) < depth:
+            entry = self.transposition_table.probe(chess.polyglot.zobrist_hash(board), count=False)
+            if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+                break
+            pv.append(entry[3])
+            board.push(entry[3])
+        return pv
+
+    def iterate_search(self, depth=None, time_limit=None, node_limit=None, stop_event=None):
+        if depth is None and time_limit is None and node_limit is None:
+            depth = DEFAULT_DEPTH
+        max_depth = depth or MAX_DEPTH
+
+        self.transposition_table.new_search()
+        self.move_orderer.new_search()
+        self.stats = SearchStats(self.transposition_table, self.evaluator.pawn_table)
+        self.principal_variation = []
+        self.best_move = None
+        self.root_ply = len(self.chess_board.move_stack)
+        self.evaluator.reset(self.chess_board)
+        self.node_limit = node_limit
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.can_abort = False
+        self.stop_event = stop_event
+
+        score = None
+        for iteration_depth in range(1, max_depth + 1):
+            try:
+                move, score = self.aspiration_search(iteration_depth, score)
+            except SearchAborted:
+                while len(self.chess_board.move_stack) > self.root_ply:
+                    self.pop()
+                return
+            if move is None:
+                return
+            self.best_move = move
+            self.principal_variation = self.extract_pv(iteration_depth)
+            if self.analysis_cache is not None and iteration_depth >= self.analysis_cache.min_depth:
+                self.save_analysis()
+            yield self.stats.record_iteration(score, move, self.principal_variation)
+            # The first completed iteration guarantees a move; later ones
+            # may be cut short by the time or node budget.
+            self.can_abort = True
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return
+            if stop_event is not None and stop_event.is_set():
+                return
+
+    def get_best_move(self, depth=None, time_limit=None, node_limit=None, stop_event=None, info_callback=None):
+        # Book, tablebase and stored analysis moves are played without searching.
+        move = self.book_move()
+        if move is None and self.tablebases:
+            move = self.tablebases.best_move(self.chess_board)
+        if move is None:
+            move = self.cached_move(depth)
+        if move is not None:
+            self.best_move = move
+            return move
+        for info in self.iterate_search(depth, time_limit, node_limit, stop_event):
+            if info_callback is not None:
+                info_callback(info)
+        return self.best_move
@@ -0,0 +1,64 @@
+from array import array
+import chess
+
+# Piece values indexed by chess piece type, used only to rank captures.
+ORDER_VALUES = (0, 1, 3, 3, 5, 9, 20)
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+PROMOTION_SCORE = 1 << 27
+KILLER_SCORE = 1 << 26
+HISTORY_LIMIT = 1 << 20
+MAX_PLY = 128
+
+
+def mvv_lva(board, move):
+    if board.is_en_passant(move):
+        victim = chess.PAWN
+    else:
+        victim = board.piece_type_at(move.to_square)
+    attacker = board.piece_type_at(move.from_square)
+    return ORDER_VALUES[victim] * 64 - ORDER_VALUES[attacker]
+
+
+class MoveOrderer:
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [array('l', [0]) * (64 * 64) for _ in chess.COLORS]
+
+    def clear(self):
+        self.__init__()
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        for table in self.history:
+            for index in range(len(table)):
+                table[index] >>= 1
+
+    def score(self, board, move, hash_move, ply):
+        if move == hash_move:
+            return HASH_MOVE_SCORE
+        if board.is_capture(move):
+            return CAPTURE_SCORE + mvv_lva(board, move)
+        if move.promotion:
+            return PROMOTION_SCORE + move.promotion
+        if ply < MAX_PLY and move in self.killers[ply]:
+            return KILLER_SCORE + (move == self.killers[ply][0])
+        return self.history[board.turn][move.from_square << 6 | move.to_square]
+
+    def order(self, board, moves, hash_move=None, ply=0):
+        return sorted(moves, key=lambda move: self.score(board, move, hash_move, ply), reverse=True)
+
+    def record_cutoff(self, board, move, depth, ply):
+        if board.is_capture(move) or move.promotion:
+            return
+        if ply < MAX_PLY and self.killers[ply][0] != move:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move
+
+        table = self.history[board.turn]
+        index = move.from_square << 6 | move.to_square
+        table[index] += depth * depth
+        if table[index] >= HISTORY_LIMIT:
+            for i in range(len(table)):
+                table[i] >>= 1
@@ -0,0 +1,139 @@
+import multiprocessing
+import time
+import chess
+from AI.minimax import Ai, SearchAborted, DEFAULT_TT_SIZE_MB, DEFAULT_DEPTH, MAX_DEPTH, INFINITY
+
+worker_ai = None
+# Best root score found so far in the current iteration, shared by all workers.
+root_bound = None
+
+
+def init_worker(tt_size_mb, bound):
+    global worker_ai, root_bound
+    worker_ai = Ai(tt_size_mb)
+    root_bound = bound
+
+
+def raise_bound(score):
+    with root_bound.get_lock():
+        if score > root_bound.value:
+            root_bound.value = score
+
+
+def search_moves(fen, history, moves, depth, deadline):
+    # Runs in a pool process: search a slice of the root moves, keeping the
+    # process-local transposition table warm between iterations. Each move
+    # first gets a null window at the best score any worker has found, and
+    # a full search only when it beats it.
+    ai = worker_ai
+    ai.chess_board = chess.Board(fen)
+    for uci in history:
+        ai.chess_board.push_uci(uci)
+    ai.evaluator.reset(ai.chess_board)
+    ai.transposition_table.new_search()
+    ai.stats.nodes = 0
+    ai.root_ply = len(ai.chess_board.move_stack)
+    ai.deadline = None if deadline is None else time.perf_counter() + deadline - time.time()
+    ai.node_limit = None
+    ai.can_abort = deadline is not None
+    ai.stop_event = None
+
+    results = []
+    try:
+        for index, uci in moves:
+            alpha = root_bound.value
+            ai.push(chess.Move.from_uci(uci))
+            exact = True
+            if alpha == -INFINITY:
+                score = -ai.negamax(depth - 1, -INFINITY, INFINITY)
+            else:
+                score = -ai.negamax(depth - 1, -alpha - 1, -alpha)
+                if score > alpha:
+                    score = -ai.negamax(depth - 1, -INFINITY, -alpha)
+                else:
+                    exact = False
+            ai.pop()
+            results.append((index, uci, score, exact))
+            raise_bound(score)
+    except SearchAborted:
+        return None, ai.stats.nodes
+    return results, ai.stats.nodes
+
+
+class ParallelSearch:
+    def __init__(self, workers=2, tt_size_mb=DEFAULT_TT_SIZE_MB):
+        self.workers = max(1, workers)
+        self.ai = Ai(tt_size_mb)
+        self.nodes = 0
+        self.depth_times = []
+        self.bound = multiprocessing.Value('d', -INFINITY)
+        self.pool = None
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers, initializer=init_worker,
+                                             initargs=(tt_size_mb, self.bound))
+        else:
+            # One worker runs the same jobs in this process.
+            init_worker(tt_size_mb, self.bound)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run_jobs(self, args):
+        if self.pool is None:
+            return [search_moves(*job) for job in args]
+        return [job.get() for job in [self.pool.apply_async(search_moves, job) for job in args]]
+
+    def get_best_move(self, board, depth=None, time_limit=None):
+        if depth is None and time_limit is None:
+            depth = DEFAULT_DEPTH
+        max_depth = depth or MAX_DEPTH
+        started = time.perf_counter()
+        deadline = None if time_limit is None else time.time() + time_limit
+        fen = board.root().fen()
+        history = [move.uci() for move in board.move_stack]
+        root_moves = [move.uci() for move in self.ai.move_orderer.order(board, board.legal_moves)]
+
+        self.nodes = 0
+        self.depth_times = []
+        best_move = None
+        for iteration_depth in range(1, max_depth + 1):
+            # The first iteration always completes so there is a move to return.
+            iteration_deadline = deadline if best_move is not None else None
+            self.bound.value = -INFINITY
+            # The previous best move is searched alone first, so that every
+            # worker starts the other moves with its score as the bound.
+            moves = list(enumerate(root_moves))
+            batches = [[moves[:1]], [moves[1 + index::self.workers] for index in range(self.workers)]]
+            results = []
+            complete = True
+            for batch in batches:
+                for chunk_results, nodes in self.run_jobs([(fen, history, chunk, iteration_depth, iteration_deadline)
+                                                           for chunk in batch if chunk]):
+                    self.nodes += nodes
+                    if chunk_results is None:
+                        complete = False
+                    else:
+                        results.extend(chunk_results)
+                if not complete:
+                    break
+            if not complete or not results:
+                break
+
+            # A move that only failed low scores at most its bound, so it
+            # loses a tie with an exact score.
+            results.sort(key=lambda result: (-result[2], not result[3], result[0]))
+            root_moves = [uci for _, uci, _, _ in results]
+            best_move = chess.Move.from_uci(root_moves[0])
+            self.depth_times.append(time.perf_counter() - started)
+            if deadline is not None and time.time() >= deadline:
+                break
+        return best_move
@@ -0,0 +1,134 @@
+from array import array
+import chess
+import chess.polyglot
+
+DEFAULT_PAWN_TABLE_SIZE_KB = 1024
+
+DOUBLED = (-10, -20)
+ISOLATED = (-10, -15)
+# Passed pawn bonuses by rank as seen from the pawn's own side.
+PASSED_MG = (0, 5, 10, 15, 25, 40, 60, 0)
+PASSED_EG = (0, 10, 20, 35, 60, 100, 150, 0)
+# Middlegame penalty for the king's own nearest pawn on each of the three
+# files around it, by how far it has advanced (none at all is the worst).
+SHELTER = (0, 0, -10, -20, -25, -25, -25, -25)
+SHELTER_MISSING = -35
+SHELTER_RANKS = 2
+
+# Polyglot keys of the pawns alone: black pawns are piece kind 0, white 1.
+PAWN_KEYS = [[chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * (color == chess.WHITE) + square] for square in chess.SQUARES]
+             for color in chess.COLORS]
+UNKNOWN = -32768
+# key (8) + middlegame and endgame score (4 + 4) + 16 cached shelter terms (2 each)
+ENTRY_SIZE = 48
+
+
+def build_front_spans():
+    spans = {}
+    for color in chess.COLORS:
+        spans[color] = []
+        for square in chess.SQUARES:
+            rank = chess.square_rank(square)
+            ranks = range(rank + 1, 8) if color == chess.WHITE else range(rank)
+            spans[color].append(sum(chess.BB_RANKS[r] for r in ranks))
+    return spans
+
+
+FRONT_SPANS = build_front_spans()
+ADJACENT_FILES = [(chess.BB_FILES[file - 1] if file > 0 else 0) | (chess.BB_FILES[file + 1] if file < 7 else 0)
+                  for file in range(8)]
+PASSED_MASKS = {color: [FRONT_SPANS[color][square] & (chess.BB_FILES[chess.square_file(square)] |
+                                                      ADJACENT_FILES[chess.square_file(square)])
+                        for square in chess.SQUARES]
+                for color in chess.COLORS}
+
+
+def evaluate_pawns(white_pawns, black_pawns):
+    # (middlegame, endgame) pawn-structure score, white positive.
+    mg = eg = 0
+    pawns = {chess.WHITE: white_pawns, chess.BLACK: black_pawns}
+    for color in chess.COLORS:
+        sign = 1 if color == chess.WHITE else -1
+        own, enemy = pawns[color], pawns[not color]
+        for file in range(8):
+            count = chess.popcount(own & chess.BB_FILES[file])
+            if count > 1:
+                mg += sign * DOUBLED[0] * (count - 1)
+                eg += sign * DOUBLED[1] * (count - 1)
+            if count and not own & ADJACENT_FILES[file]:
+                mg += sign * ISOLATED[0] * count
+                eg += sign * ISOLATED[1] * count
+        for square in chess.scan_forward(own):
+            if not enemy & PASSED_MASKS[color][square]:
+                rank = chess.square_rank(square) if color == chess.WHITE else 7 - chess.square_rank(square)
+                mg += sign * PASSED_MG[rank]
+                eg += sign * PASSED_EG[rank]
+    return mg, eg
+
+
+def king_shelter(own_pawns, color, king_file):
+    # Middlegame penalty for the pawns in front of a king on its back ranks.
+    penalty = 0
+    for file in range(max(0, king_file - 1), min(7, king_file + 1) + 1):
+        file_pawns = own_pawns & chess.BB_FILES[file]
+        if not file_pawns:
+            penalty += SHELTER_MISSING
+            continue
+        nearest = chess.lsb(file_pawns) if color == chess.WHITE else chess.msb(file_pawns)
+        rank = chess.square_rank(nearest) if color == chess.WHITE else 7 - chess.square_rank(nearest)
+        penalty += SHELTER[rank]
+    return penalty
+
+
+class PawnTable:
+    def __init__(self, size_kb=DEFAULT_PAWN_TABLE_SIZE_KB):
+        self.resize(size_kb)
+
+    def resize(self, size_kb):
+        buckets = 1 << (max(2, int(size_kb * 1024) // ENTRY_SIZE // 2).bit_length() - 1)
+        slots = buckets * 2
+        self.size_kb = size_kb
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(8 * slots))
+        self.mg = array('i', bytes(4 * slots))
+        self.eg = array('i', bytes(4 * slots))
+        self.shelters = array('h', [UNKNOWN]) * (16 * slots)
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        self.resize(self.size_kb)
+
+    def entry(self, key, white_pawns, black_pawns):
+        # Slot of the entry for this pawn structure, evaluated on a miss.
+        # Each bucket keeps the two most recently used structures. An empty
+        # slot matches only the zero key of a board without pawns, whose
+        # scores are zero anyway.
+        self.probes += 1
+        index = (key & self.mask) << 1
+        if self.keys[index] == key:
+            self.hits += 1
+            return index
+        other = index + 1
+        if self.keys[other] == key:
+            self.hits += 1
+            return other
+        self.keys[other] = self.keys[index]
+        self.mg[other] = self.mg[index]
+        self.eg[other] = self.eg[index]
+        self.shelters[16 * other:16 * other + 16] = self.shelters[16 * index:16 * index + 16]
+        self.keys[index] = key
+        self.mg[index], self.eg[index] = evaluate_pawns(white_pawns, black_pawns)
+        self.shelters[16 * index:16 * index + 16] = array('h', [UNKNOWN]) * 16
+        return index
+
+    def shelter(self, index, own_pawns, color, king_file):
+        slot = 16 * index + 8 * (color == chess.WHITE) + king_file
+        value = self.shelters[slot]
+        if value == UNKNOWN:
+            value = self.shelters[slot] = king_shelter(own_pawns, color, king_file)
+        return value
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
@@ -0,0 +1,65 @@
+import chess
+
+SEE_VALUES = (0, 100, 320, 330, 500, 900, 20000)
+
+
+def attackers_mask(board, color, square, occupied):
+    rank_pieces = chess.BB_RANK_MASKS[square] & occupied
+    file_pieces = chess.BB_FILE_MASKS[square] & occupied
+    diag_pieces = chess.BB_DIAG_MASKS[square] & occupied
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+
+    attackers = (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (chess.BB_RANK_ATTACKS[square][rank_pieces] & queens_and_rooks)
+        | (chess.BB_FILE_ATTACKS[square][file_pieces] & queens_and_rooks)
+        | (chess.BB_DIAG_ATTACKS[square][diag_pieces] & queens_and_bishops)
+        | (chess.BB_PAWN_ATTACKS[not color][square] & board.pawns)
+    )
+    return attackers & board.occupied_co[color] & occupied
+
+
+def least_valuable_attacker(board, color, attackers):
+    for piece_type in chess.PIECE_TYPES:
+        pieces = attackers & board.pieces_mask(piece_type, color)
+        if pieces:
+            return piece_type, (pieces & -pieces).bit_length() - 1
+    return None, None
+
+
+def see(board, move):
+    # Static exchange evaluation: the material balance, from the mover's
+    # point of view, of the best capture sequence on the target square.
+    target = move.to_square
+    occupied = board.occupied ^ chess.BB_SQUARES[move.from_square]
+    if board.is_en_passant(move):
+        victim = chess.PAWN
+        occupied ^= chess.BB_SQUARES[target + (-8 if board.turn == chess.WHITE else 8)]
+    else:
+        victim = board.piece_type_at(target) or 0
+
+    gains = [SEE_VALUES[victim]]
+    attacker_value = SEE_VALUES[board.piece_type_at(move.from_square)]
+    if move.promotion:
+        gains[0] += SEE_VALUES[move.promotion] - SEE_VALUES[chess.PAWN]
+        attacker_value = SEE_VALUES[move.promotion]
+
+    color = not board.turn
+    while True:
+        gains.append(attacker_value - gains[-1])
+        if max(-gains[-2], gains[-1]) < 0:
+            break
+        piece_type, square = least_valuable_attacker(board, color, attackers_mask(board, color, target, occupied))
+        if piece_type is None:
+            break
+        occupied ^= chess.BB_SQUARES[square]
+        attacker_value = SEE_VALUES[piece_type]
+        color = not color
+
+    gains.pop()
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+    return gains[0]
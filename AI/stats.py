@@ -0,0 +1,143 @@
+import json
+import time
+
+
+class SearchStats:
+    def __init__(self, transposition_table=None, pawn_table=None):
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.seldepth = 0
+        self.tablebase_hits = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.null_move_cutoffs = 0
+        self.null_move_verifications = 0
+        self.reductions = 0
+        self.re_searches = 0
+        self.futility_prunes = 0
+        self.reverse_futility_cutoffs = 0
+        self.pv_re_searches = 0
+        self.aspiration_fail_lows = 0
+        self.aspiration_fail_highs = 0
+        self.iteration_nodes = []
+        self.iteration_times = []
+        self.iterations = []
+        self.transposition_table = transposition_table
+        self.tt_probes_at_start = transposition_table.probes if transposition_table else 0
+        self.tt_hits_at_start = transposition_table.hits if transposition_table else 0
+        self.pawn_table = pawn_table
+        self.pawn_probes_at_start = pawn_table.probes if pawn_table else 0
+        self.pawn_hits_at_start = pawn_table.hits if pawn_table else 0
+        self.started = time.perf_counter()
+
+    def record_cutoff(self, move_index):
+        self.beta_cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+
+    @property
+    def first_move_cutoff_rate(self):
+        if not self.beta_cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / self.beta_cutoffs
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def nps(self):
+        return self.nodes / max(self.elapsed, 1e-9)
+
+    @property
+    def tt_probes(self):
+        if self.transposition_table is None:
+            return 0
+        return self.transposition_table.probes - self.tt_probes_at_start
+
+    @property
+    def tt_hits(self):
+        if self.transposition_table is None:
+            return 0
+        return self.transposition_table.hits - self.tt_hits_at_start
+
+    @property
+    def pawn_probes(self):
+        if self.pawn_table is None:
+            return 0
+        return self.pawn_table.probes - self.pawn_probes_at_start
+
+    @property
+    def pawn_hits(self):
+        if self.pawn_table is None:
+            return 0
+        return self.pawn_table.hits - self.pawn_hits_at_start
+
+    @property
+    def depth(self):
+        return len(self.iterations)
+
+    def record_iteration(self, score=None, best_move=None, pv=()):
+        self.iteration_nodes.append(self.nodes - sum(self.iteration_nodes))
+        self.iteration_times.append(self.elapsed)
+        info = self.summary()
+        info.update({
+            'score': score,
+            'best_move': best_move.uci() if best_move else None,
+            'pv': [move.uci() for move in pv],
+        })
+        info['depth'] += 1
+        self.iterations.append(info)
+        return info
+
+    @property
+    def effective_branching_factor(self):
+        if len(self.iteration_nodes) < 2:
+            return 0.0
+        return self.iteration_nodes[-1] / max(1, self.iteration_nodes[-2])
+
+    def summary(self):
+        probes = self.tt_probes
+        return {
+            'depth': self.depth,
+            'seldepth': self.seldepth,
+            'nodes': self.nodes,
+            'quiescence_nodes': self.quiescence_nodes,
+            'time': round(self.elapsed, 4),
+            'nps': round(self.nps),
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoff_rate': round(self.first_move_cutoff_rate, 4),
+            'null_move_cutoffs': self.null_move_cutoffs,
+            'null_move_verifications': self.null_move_verifications,
+            'reductions': self.reductions,
+            're_searches': self.re_searches,
+            'futility_prunes': self.futility_prunes,
+            'reverse_futility_cutoffs': self.reverse_futility_cutoffs,
+            'pv_re_searches': self.pv_re_searches,
+            'aspiration_fail_lows': self.aspiration_fail_lows,
+            'aspiration_fail_highs': self.aspiration_fail_highs,
+            'effective_branching_factor': round(self.effective_branching_factor, 2),
+            'tt_probes': probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': round(self.tt_hits / probes, 4) if probes else 0.0,
+            'pawn_probes': self.pawn_probes,
+            'pawn_hits': self.pawn_hits,
+            'pawn_hit_rate': round(self.pawn_hits / self.pawn_probes, 4) if self.pawn_probes else 0.0,
+            'tablebase_hits': self.tablebase_hits,
+            'hashfull': self.transposition_table.usage() if self.transposition_table else 0,
+        }
+
+    def to_dict(self):
+        result = self.summary()
+        if self.iterations:
+            last = self.iterations[-1]
+            result.update(score=last['score'], best_move=last['best_move'], pv=last['pv'])
+        result['iterations'] = self.iterations
+        return result
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
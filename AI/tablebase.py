@@ -0,0 +1,128 @@
+import mmap
+import os
+import struct
+import chess
+import chess.syzygy
+
+# One table per material signature; the lone piece always belongs to the
+# strong side, and positions with a black piece are probed mirrored.
+MATERIALS = {'KPK': chess.PAWN, 'KRK': chess.ROOK, 'KQK': chess.QUEEN}
+TABLE_SUFFIX = '.tbl'
+MAGIC = b'PCTB'
+VERSION = 1
+HEADER = struct.Struct('>4sBB')
+POSITIONS = 2 << 18
+
+# One byte per position, from the side to move's point of view:
+# 1-127 wins in that many plies, LOSS + n is mated in n plies.
+DRAW = 0
+LOSS = 128
+ILLEGAL = 255
+
+
+def table_index(strong_to_move, strong_king, weak_king, piece_square):
+    return (0 if strong_to_move else 1) << 18 | strong_king << 12 | weak_king << 6 | piece_square
+
+
+def decode(value):
+    # (wdl, plies to mate) for the side to move, or None for an illegal position.
+    if value == ILLEGAL:
+        return None
+    if value == DRAW:
+        return 0, 0
+    if value < LOSS:
+        return 1, value
+    return -1, value - LOSS
+
+
+class Tablebases:
+    def __init__(self, directory=None):
+        self.tables = {}
+        self.files = []
+        self.syzygy = None
+        if directory is not None:
+            self.open(directory)
+
+    def open(self, directory):
+        for name, piece_type in MATERIALS.items():
+            path = os.path.join(directory, name + TABLE_SUFFIX)
+            if not os.path.exists(path):
+                continue
+            file = open(path, 'rb')
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, table_piece = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION or table_piece != piece_type or \
+                    len(data) != HEADER.size + POSITIONS:
+                data.close()
+                file.close()
+                raise ValueError(f"{path} is not a {name} table")
+            self.files.append(file)
+            self.tables[piece_type] = data
+        if any(name.endswith('.rtbw') for name in os.listdir(directory)):
+            self.syzygy = chess.syzygy.open_tablebase(directory)
+
+    def close(self):
+        for data in self.tables.values():
+            data.close()
+        for file in self.files:
+            file.close()
+        if self.syzygy is not None:
+            self.syzygy.close()
+        self.tables = {}
+        self.files = []
+        self.syzygy = None
+
+    def __bool__(self):
+        return bool(self.tables) or self.syzygy is not None
+
+    def probe_pieces(self, white_to_move, white_king, black_king, piece_type, white_piece, piece_square):
+        # Squares are numbered as in python-chess (a1 = 0).
+        data = self.tables.get(piece_type)
+        if data is None:
+            return None
+        if white_piece:
+            strong_king, weak_king = white_king, black_king
+        else:
+            strong_king, weak_king, piece_square = black_king ^ 56, white_king ^ 56, piece_square ^ 56
+        strong_to_move = white_to_move == white_piece
+        return decode(data[HEADER.size + table_index(strong_to_move, strong_king, weak_king, piece_square)])
+
+    def probe(self, board):
+        pieces = board.occupied & ~board.kings
+        if self.tables and chess.popcount(pieces) == 1:
+            square = chess.lsb(pieces)
+            result = self.probe_pieces(board.turn, board.king(chess.WHITE), board.king(chess.BLACK),
+                                       board.piece_type_at(square), board.color_at(square) == chess.WHITE, square)
+            if result is not None:
+                return result
+        if self.syzygy is not None:
+            try:
+                wdl = self.syzygy.probe_wdl(board)
+            except KeyError:
+                return None
+            # Cursed wins and blessed losses are draws under the fifty-move rule.
+            return (1 if wdl > 1 else -1 if wdl < -1 else 0), None
+        return None
+
+    def result(self, board):
+        if board.is_insufficient_material():
+            return 0, 0
+        return self.probe(board)
+
+    def best_move(self, board):
+        # The move keeping the best result: the fastest win, else a draw,
+        # else the longest resistance. None unless every reply is known.
+        best_move = None
+        best_rank = None
+        for move in board.legal_moves:
+            board.push(move)
+            result = self.result(board)
+            board.pop()
+            if result is None:
+                return None
+            wdl, plies = result
+            plies = plies or 0
+            rank = (-wdl, -plies if wdl < 0 else plies)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
@@ -0,0 +1,85 @@
+from array import array
+import chess
+
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# key (8) + score (4) + move (2) + depth (1) + bound/generation (1)
+ENTRY_SIZE = 16
+
+
+def encode_move(move):
+    if move is None:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def decode_move(code):
+    if not code:
+        return None
+    return chess.Move(code & 63, code >> 6 & 63, code >> 12 or None)
+
+
+def bound_type(score, alpha, beta):
+    if score <= alpha:
+        return UPPER
+    if score >= beta:
+        return LOWER
+    return EXACT
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        entries = max(2, int(size_mb * 1024 * 1024) // ENTRY_SIZE)
+        buckets = 1 << ((entries // 2).bit_length() - 1)
+        slots = buckets * 2
+        self.size_mb = size_mb
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(8 * slots))
+        self.scores = array('i', bytes(4 * slots))
+        self.moves = array('H', bytes(2 * slots))
+        self.depths = array('b', bytes(slots))
+        self.flags = array('B', bytes(slots))
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self):
+        self.resize(self.size_mb)
+
+    def new_search(self):
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key, count=True):
+        self.probes += count
+        slot = (key & self.mask) << 1
+        for index in (slot, slot + 1):
+            if self.flags[index] and self.keys[index] == key:
+                self.hits += count
+                return self.depths[index], self.scores[index], self.flags[index] & 3, decode_move(self.moves[index])
+        return None
+
+    def store(self, key, depth, score, bound, move=None):
+        # Each bucket holds a depth-preferred slot and an always-replace slot.
+        # Entries from an older search lose their claim on the deep slot.
+        index = (key & self.mask) << 1
+        flags = self.flags[index]
+        if (self.keys[index] != key and flags and flags >> 2 == self.generation
+                and depth < self.depths[index]):
+            index += 1
+        if move is None and self.keys[index] == key:
+            move = decode_move(self.moves[index])
+
+        self.keys[index] = key
+        self.scores[index] = int(score)
+        self.moves[index] = encode_move(move)
+        self.depths[index] = max(-128, min(127, depth))
+        self.flags[index] = bound | self.generation << 2
+
+    def usage(self):
+        sample = min(len(self.flags), 2000)
+        return sum(1 for index in range(sample) if self.flags[index]) * 1000 // sample
@@ -0,0 +1,53 @@
+import threading
+
+
+class SearchWorker:
+    def __init__(self, ai):
+        self.ai = ai
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.best_move = None
+        self.finished = False
+
+    @property
+    def busy(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, depth=None, time_limit=None, node_limit=None):
+        # The search runs on self.ai.chess_board, which must not be touched
+        # from the caller's thread until the result has been collected.
+        self.cancel()
+        self.stop_event = threading.Event()
+        self.best_move = None
+        self.finished = False
+        self.thread = threading.Thread(target=self.run, args=(depth, time_limit, node_limit, self.stop_event),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, depth, time_limit, node_limit, stop_event):
+        best_move = self.ai.get_best_move(depth=depth, time_limit=time_limit, node_limit=node_limit,
+                                          stop_event=stop_event)
+        if not stop_event.is_set():
+            self.best_move = best_move
+            self.finished = True
+
+    def poll(self):
+        if self.finished and not self.busy:
+            self.finished = False
+            self.thread = None
+            return True, self.best_move
+        return False, None
+
+    def wait(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return self.poll()
+
+    def cancel(self):
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.finished = False
+        self.best_move = None
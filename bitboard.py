@@ -0,0 +1,368 @@
+COLORS = ('white', 'black')
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+
+# Square index is y * 8 + x, so bit 0 is the top-left square (a8) and
+# "north" means towards y == 0, the direction white pawns move in.
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_A = FULL ^ FILE_A
+NOT_H = FULL ^ FILE_H
+NOT_AB = NOT_A & (FULL ^ (FILE_A << 1))
+NOT_GH = NOT_H & (FULL ^ (FILE_H >> 1))
+ROW = [0xFF << (8 * y) for y in range(8)]
+
+PAWN_START_ROW = {'white': 6, 'black': 1}
+# (rook x, squares that must be empty, squares the king must not cross
+# under attack) as row-0 masks, shifted onto the back row when used.
+CASTLING_PATHS = ((7, 0b01100000, 0b01110000), (0, 0b00001110, 0b00011100))
+BACK_ROW = {'white': 7, 'black': 0}
+
+
+def other(color):
+    return 'black' if color == 'white' else 'white'
+
+
+def square(x, y):
+    return y * 8 + x
+
+
+def coords(sq):
+    return sq & 7, sq >> 3
+
+
+def square_name(x, y):
+    return 'abcdefgh'[x] + str(8 - y)
+
+
+def iter_squares(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def en_passant_victim(en_passant, color):
+    return en_passant + 8 if color == 'white' else en_passant - 8
+
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+
+def north(bb):
+    return bb >> 8
+
+
+def south(bb):
+    return (bb << 8) & FULL
+
+
+def east(bb):
+    return (bb << 1) & NOT_A
+
+
+def west(bb):
+    return (bb >> 1) & NOT_H
+
+
+def north_east(bb):
+    return (bb >> 7) & NOT_A
+
+
+def north_west(bb):
+    return (bb >> 9) & NOT_H
+
+
+def south_east(bb):
+    return (bb << 9) & NOT_A & FULL
+
+
+def south_west(bb):
+    return (bb << 7) & NOT_H & FULL
+
+
+ORTHOGONAL_STEPS = (north, south, east, west)
+DIAGONAL_STEPS = (north_east, north_west, south_east, south_west)
+
+
+def knight_attacks(bb):
+    one = ((bb >> 1) & NOT_H) | ((bb << 1) & NOT_A)
+    two = ((bb >> 2) & NOT_GH) | ((bb << 2) & NOT_AB)
+    return ((one << 16) | (one >> 16) | (two << 8) | (two >> 8)) & FULL
+
+
+def king_attacks(bb):
+    row = bb | east(bb) | west(bb)
+    return (row | north(row) | south(row)) & ~bb
+
+
+def pawn_attacks(bb, color):
+    if color == 'white':
+        return north_east(bb) | north_west(bb)
+    return south_east(bb) | south_west(bb)
+
+
+def slide(bb, occupied, steps):
+    empty = FULL ^ occupied
+    attacks = 0
+    for step in steps:
+        ray = step(bb)
+        while ray:
+            attacks |= ray
+            ray = step(ray & empty)
+    return attacks
+
+
+def rook_attacks(bb, occupied):
+    return slide(bb, occupied, ORTHOGONAL_STEPS)
+
+
+def bishop_attacks(bb, occupied):
+    return slide(bb, occupied, DIAGONAL_STEPS)
+
+
+def queen_attacks(bb, occupied):
+    return slide(bb, occupied, ORTHOGONAL_STEPS + DIAGONAL_STEPS)
+
+
+KNIGHT_ATTACKS = [knight_attacks(1 << sq) for sq in range(64)]
+KING_ATTACKS = [king_attacks(1 << sq) for sq in range(64)]
+PAWN_ATTACKS = {color: [pawn_attacks(1 << sq, color) for sq in range(64)] for color in COLORS}
+
+# Rays run from a square to the board edge. Directions that increase the
+# square index find their first blocker with the lowest set bit, the others
+# with the highest.
+RAYS = {step: [slide(1 << sq, 0, (step,)) for sq in range(64)] for step in ORTHOGONAL_STEPS + DIAGONAL_STEPS}
+ASCENDING_STEPS = (south, east, south_east, south_west)
+QUEEN_RAYS = [rook_ray | bishop_ray for rook_ray, bishop_ray in zip(
+    [slide(1 << sq, 0, ORTHOGONAL_STEPS) for sq in range(64)],
+    [slide(1 << sq, 0, DIAGONAL_STEPS) for sq in range(64)])]
+
+
+def ray_attacks(sq, occupied, step):
+    rays = RAYS[step]
+    ray = rays[sq]
+    blockers = ray & occupied
+    if blockers:
+        if step in ASCENDING_STEPS:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        else:
+            ray ^= rays[blockers.bit_length() - 1]
+    return ray
+
+
+def rook_attacks_from(sq, occupied):
+    return (ray_attacks(sq, occupied, north) | ray_attacks(sq, occupied, south)
+            | ray_attacks(sq, occupied, east) | ray_attacks(sq, occupied, west))
+
+
+def bishop_attacks_from(sq, occupied):
+    return (ray_attacks(sq, occupied, north_east) | ray_attacks(sq, occupied, north_west)
+            | ray_attacks(sq, occupied, south_east) | ray_attacks(sq, occupied, south_west))
+
+
+def piece_attacks(color, piece_type, sq, occupied):
+    if piece_type == 'pawn':
+        return PAWN_ATTACKS[color][sq]
+    if piece_type == 'knight':
+        return KNIGHT_ATTACKS[sq]
+    if piece_type == 'bishop':
+        return bishop_attacks_from(sq, occupied)
+    if piece_type == 'rook':
+        return rook_attacks_from(sq, occupied)
+    if piece_type == 'queen':
+        return rook_attacks_from(sq, occupied) | bishop_attacks_from(sq, occupied)
+    return KING_ATTACKS[sq]
+
+
+class Bitboards:
+    def __init__(self):
+        self.pieces = {color: dict.fromkeys(PIECE_TYPES, 0) for color in COLORS}
+        self.occupied = dict.fromkeys(COLORS, 0)
+        self.attacks_from = [0] * 64
+        self.attack_maps = dict.fromkeys(COLORS, 0)
+
+    def copy(self):
+        bitboards = Bitboards.__new__(Bitboards)
+        bitboards.pieces = {color: dict(pieces) for color, pieces in self.pieces.items()}
+        bitboards.occupied = dict(self.occupied)
+        bitboards.attacks_from = list(self.attacks_from)
+        bitboards.attack_maps = dict(self.attack_maps)
+        return bitboards
+
+    @classmethod
+    def from_rows(cls, rows):
+        bitboards = cls()
+        for y, row in enumerate(rows):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    bitboards.put(piece.color, piece.piece_type, square(x, y))
+        return bitboards
+
+    def put(self, color, piece_type, sq):
+        mask = 1 << sq
+        self.pieces[color][piece_type] |= mask
+        self.occupied[color] |= mask
+        self.update_attacks(sq)
+
+    def remove(self, color, piece_type, sq):
+        mask = ~(1 << sq)
+        self.pieces[color][piece_type] &= mask
+        self.occupied[color] &= mask
+        self.update_attacks(sq)
+
+    def move(self, color, piece_type, from_sq, to_sq):
+        self.remove(color, piece_type, from_sq)
+        self.put(color, piece_type, to_sq)
+
+    def all_occupied(self):
+        return self.occupied['white'] | self.occupied['black']
+
+    def update_attacks(self, sq):
+        # Only the piece on the changed square and the sliders whose current
+        # attack set reaches it can see a different set of squares.
+        mask = 1 << sq
+        occupied = self.all_occupied()
+        attacks_from = self.attacks_from
+        piece = self.piece_at(sq)
+        attacks_from[sq] = piece_attacks(piece[0], piece[1], sq, occupied) if piece else 0
+
+        for color in COLORS:
+            pieces = self.pieces[color]
+            diagonal = pieces['bishop'] | pieces['queen']
+            orthogonal = pieces['rook'] | pieces['queen']
+            for slider in iter_squares((diagonal | orthogonal) & ~mask):
+                if attacks_from[slider] & mask:
+                    attacks = 0
+                    if diagonal >> slider & 1:
+                        attacks |= bishop_attacks_from(slider, occupied)
+                    if orthogonal >> slider & 1:
+                        attacks |= rook_attacks_from(slider, occupied)
+                    attacks_from[slider] = attacks
+
+            attack_map = 0
+            for origin in iter_squares(self.occupied[color]):
+                attack_map |= attacks_from[origin]
+            self.attack_maps[color] = attack_map
+
+    def attacked_squares(self, color, occupied=None):
+        if occupied is None:
+            return self.attack_maps[color]
+        pieces = self.pieces[color]
+        return (pawn_attacks(pieces['pawn'], color)
+                | knight_attacks(pieces['knight'])
+                | bishop_attacks(pieces['bishop'] | pieces['queen'], occupied)
+                | rook_attacks(pieces['rook'] | pieces['queen'], occupied)
+                | king_attacks(pieces['king']))
+
+    def is_attacked(self, sq, by_color, occupied=None, captured=0):
+        if occupied is None and not captured:
+            return bool(self.attack_maps[by_color] >> sq & 1)
+        if occupied is None:
+            occupied = self.all_occupied()
+        pieces = self.pieces[by_color]
+        alive = FULL ^ captured
+        if KNIGHT_ATTACKS[sq] & pieces['knight'] & alive:
+            return True
+        if PAWN_ATTACKS[other(by_color)][sq] & pieces['pawn'] & alive:
+            return True
+        if KING_ATTACKS[sq] & pieces['king']:
+            return True
+        if bishop_attacks_from(sq, occupied) & (pieces['bishop'] | pieces['queen']) & alive:
+            return True
+        if rook_attacks_from(sq, occupied) & (pieces['rook'] | pieces['queen']) & alive:
+            return True
+        return False
+
+    def king_square(self, color):
+        king = self.pieces[color]['king']
+        return king.bit_length() - 1 if king else None
+
+    def in_check(self, color):
+        king_sq = self.king_square(color)
+        return king_sq is not None and bool(self.attack_maps[other(color)] >> king_sq & 1)
+
+    def piece_at(self, sq):
+        mask = 1 << sq
+        for color in COLORS:
+            if self.occupied[color] & mask:
+                for piece_type, bb in self.pieces[color].items():
+                    if bb & mask:
+                        return color, piece_type
+        return None
+
+    def pseudo_moves(self, sq, color, piece_type, castling_rights=0, en_passant=None):
+        origin = 1 << sq
+        own = self.occupied[color]
+        enemy = self.occupied[other(color)]
+        occupied = own | enemy
+
+        if piece_type == 'pawn':
+            empty = FULL ^ occupied
+            step = north if color == 'white' else south
+            single = step(origin) & empty
+            moves = single
+            if sq >> 3 == PAWN_START_ROW[color]:
+                moves |= step(single) & empty
+            targets = enemy
+            if en_passant is not None and self.pieces[other(color)]['pawn'] & (1 << en_passant_victim(en_passant, color)):
+                targets |= 1 << en_passant
+            return moves | (PAWN_ATTACKS[color][sq] & targets)
+
+        moves = self.attacks_from[sq] & ~own
+        if piece_type == 'king':
+            moves |= self.castling_moves(sq, color, castling_rights, occupied)
+        return moves
+
+    def castling_moves(self, sq, color, castling_rights, occupied):
+        y = BACK_ROW[color]
+        if sq != square(4, y) or not castling_rights:
+            return 0
+        attacked = self.attack_maps[other(color)]
+        moves = 0
+        for rook_x, between, path in CASTLING_PATHS:
+            if not castling_rights & (1 << square(rook_x, y)):
+                continue
+            if occupied & (between << 8 * y) or attacked & (path << 8 * y):
+                continue
+            moves |= 1 << square(6 if rook_x == 7 else 2, y)
+        return moves
+
+    def leaves_king_safe(self, from_sq, to_sq, color, piece_type, en_passant=None):
+        if piece_type == 'king':
+            king_sq = to_sq
+        else:
+            king_sq = self.king_square(color)
+            if king_sq is None:
+                return True
+            # A piece off every line through an unchecked king cannot expose it.
+            if (not QUEEN_RAYS[king_sq] >> from_sq & 1 and to_sq != en_passant
+                    and not self.attack_maps[other(color)] >> king_sq & 1):
+                return True
+
+        destination = 1 << to_sq
+        captured = destination & self.occupied[other(color)]
+        if piece_type == 'pawn' and to_sq == en_passant and not captured:
+            captured = 1 << en_passant_victim(to_sq, color)
+        occupied = ((self.all_occupied() ^ (1 << from_sq)) & ~captured) | destination
+        return not self.is_attacked(king_sq, other(color), occupied, captured)
+
+    def legal_moves(self, sq, castling_rights=0, en_passant=None):
+        piece = self.piece_at(sq)
+        if piece is None:
+            return 0
+        color, piece_type = piece
+        moves = 0
+        for to_sq in iter_squares(self.pseudo_moves(sq, color, piece_type, castling_rights, en_passant)):
+            if self.leaves_king_safe(sq, to_sq, color, piece_type, en_passant):
+                moves |= 1 << to_sq
+        return moves
+
+    def side_moves(self, color, castling_rights=0, en_passant=None):
+        moves = {}
+        for sq in iter_squares(self.occupied[color]):
+            destinations = self.legal_moves(sq, castling_rights, en_passant)
+            if destinations:
+                moves[sq] = destinations
+        return moves
@@ -1,19 +1,79 @@
+import copy
 import pygame
 from player import Player
 from piece import Pawn, Rook, Knight, Bishop, Queen, King
-from constants import SCREEN_SIZE, WHITE, GRAY, RED, LIGHT_BLUE, piece_images
+from bitboard import Bitboards, COLORS, PIECE_TYPES, square, coords, square_name, iter_squares, popcount, other
+from zobrist import piece_key, position_key, state_key
+from constants import SCREEN_SIZE, WHITE, GRAY, RED, LIGHT_BLUE
+from sprites import sprite_cache
+
+FEN_PIECES = {'p': 'pawn', 'n': 'knight', 'b': 'bishop', 'r': 'rook', 'q': 'queen', 'k': 'king'}
+FEN_LETTERS = {piece_type: letter for letter, piece_type in FEN_PIECES.items()}
+PROMOTION_LETTERS = {'queen': 'q', 'rook': 'r', 'bishop': 'b', 'knight': 'n'}
+
+# One byte per square: the piece type (1-6) with 8 added for black, 0 if empty.
+PIECE_CODES = {(color, piece_type): index + 1 + 8 * COLORS.index(color)
+               for color in COLORS for index, piece_type in enumerate(PIECE_TYPES)}
+PIECE_NAMES = [None] * 16
+for (color, piece_type), code in PIECE_CODES.items():
+    PIECE_NAMES[code] = f"{color}_{piece_type}"
+PAWN_CODES = (PIECE_CODES['white', 'pawn'], PIECE_CODES['black', 'pawn'])
+
+rendered_surfaces = {}
+
+
+def checkerboard(square_size):
+    # The empty board never changes, so it is rendered once per square size.
+    key = ('checkerboard', square_size)
+    if key not in rendered_surfaces:
+        surface = pygame.Surface((square_size * 8, square_size * 8))
+        for y in range(8):
+            for x in range(8):
+                rect = (x * square_size, y * square_size, square_size, square_size)
+                pygame.draw.rect(surface, WHITE if (x + y) % 2 == 0 else GRAY, rect)
+        rendered_surfaces[key] = surface
+    return rendered_surfaces[key]
+
+
+def highlight_surface(square_size):
+    key = ('highlight', square_size)
+    if key not in rendered_surfaces:
+        surface = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+        surface.fill(LIGHT_BLUE + (100,))
+        rendered_surfaces[key] = surface
+    return rendered_surfaces[key]
+
+
+promoted_pieces = {}
+
+
+def promoted_piece(color, piece_type):
+    # Pieces carry no per-square state once promoted, so make_move can
+    # share one instance per kind instead of allocating on every promotion.
+    key = (color, piece_type)
+    if key not in promoted_pieces:
+        piece = Board.create_piece(color, piece_type, 0, 0)
+        piece.moved()
+        promoted_pieces[key] = piece
+    return promoted_pieces[key]
 
 
 class Board:
+    # Endgame tables (AI.tablebase.Tablebases) used to adjudicate games.
+    tablebases = None
+
     def __init__(self, current_player, initialize=True):
         self.board = self.initialize_board() if initialize else self.default_board()
         self.current_player = current_player
         self.selected_piece = None
+        # (from, to) squares of the engine's suggested move, outlined on the board.
+        self.hint = None
         self.last_move = None
-        self.move_history = []
         self.half_move_counter = 0
-        
-        self.max_history_length = 8
+        self.fullmove_number = 1
+        self.undo_stack = []
+        self.drawn_squares = None
+        self.sync_position()
 
     def initialize_board(self):
         return [
@@ -32,79 +92,273 @@ class Board:
     def reset_board(self):
         self.__init__('white')
 
-    def get_possible_moves(self, x, y):
-        if self.board is None:
-            return []
+    @classmethod
+    def from_fen(cls, fen):
+        board = cls('white', initialize=False)
+        board.set_fen(fen)
+        return board
+
+    def set_fen(self, fen):
+        fields = fen.split()
+        placement, turn = fields[0], fields[1] if len(fields) > 1 else 'w'
+        castling = fields[2] if len(fields) > 2 else '-'
+        en_passant = fields[3] if len(fields) > 3 else '-'
+
+        self.board = self.default_board()
+        for y, rank in enumerate(placement.split('/')):
+            x = 0
+            for char in rank:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                color = 'white' if char.isupper() else 'black'
+                self.board[y][x] = self.create_piece(color, FEN_PIECES[char.lower()], x, y)
+                x += 1
+
+        # Castling rights live in the has_moved flags of kings and rooks.
+        for y, rook_rights in ((7, {'K': 7, 'Q': 0}), (0, {'k': 7, 'q': 0})):
+            rights = [rook_x for char, rook_x in rook_rights.items() if char in castling]
+            for x, piece in enumerate(self.board[y]):
+                if isinstance(piece, King):
+                    piece.has_moved = not rights or x != 4
+                elif isinstance(piece, Rook):
+                    piece.has_moved = x not in rights
+        for row in self.board[1:7]:
+            for piece in row:
+                if isinstance(piece, (King, Rook)):
+                    piece.has_moved = True
 
+        self.current_player = 'white' if turn == 'w' else 'black'
+        self.last_move = None
+        if en_passant != '-':
+            x, y = ord(en_passant[0]) - ord('a'), 8 - int(en_passant[1])
+            direction = 1 if y == 2 else -1
+            self.last_move = ((x, y - direction), (x, y + direction))
+        self.selected_piece = None
+        self.hint = None
+        self.undo_stack = []
+        self.half_move_counter = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        self.sync_position()
+
+    def fen(self):
+        rows = []
+        for row in self.board:
+            text, empty = '', 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                letter = FEN_LETTERS[piece.piece_type]
+                text += (str(empty) if empty else '') + (letter.upper() if piece.color == 'white' else letter)
+                empty = 0
+            rows.append(text + (str(empty) if empty else ''))
+
+        rights = self.castling_rights()
+        castling = ''.join(char for char, sq in (('K', 63), ('Q', 56), ('k', 7), ('q', 0)) if rights >> sq & 1)
+        en_passant = self.en_passant_square()
+        return ' '.join(('/'.join(rows), self.current_player[0], castling or '-',
+                         square_name(*coords(en_passant)) if en_passant is not None else '-',
+                         str(self.half_move_counter), str(self.fullmove_number)))
+
+    def copy(self):
+        # Only kings and rooks carry state that can change (has_moved), so
+        # every other piece object is shared between the copies.
+        board = copy.copy(self)
+        board.board = [[copy.copy(piece) if isinstance(piece, (King, Rook)) else piece for piece in row]
+                       for row in self.board]
+        board.squares = bytearray(self.squares)
+        board.undo_stack = []
+        board.position_counts = dict(self.position_counts)
+        board.bitboards = self.bitboards.copy()
+        board.drawn_squares = None
+        return board
+
+    def sync_position(self):
+        self.bitboards = Bitboards.from_rows(self.board)
+        self.squares = bytearray(64)
+        for y, row in enumerate(self.board):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    self.squares[square(x, y)] = PIECE_CODES[piece.color, piece.piece_type]
+        self.zobrist_turn = self.current_player
+        self.zobrist_key = position_key(self.bitboards, self.castling_rights(), self.en_passant_square(),
+                                        self.current_player)
+        self.position_counts = {self.zobrist_key: 1}
+        self.move_cache = {}
+
+    def remove_piece(self, x, y):
         piece = self.board[y][x]
-        if not piece:
-            return []
-
-        moves = [(move_x, move_y) for move_y in range(8) for move_x in range(8)
-                if self.vaild_move(x, y, move_x, move_y)]
+        self.board[y][x] = None
+        self.squares[square(x, y)] = 0
+        self.bitboards.remove(piece.color, piece.piece_type, square(x, y))
+        self.zobrist_key ^= piece_key(piece.color, piece.piece_type, square(x, y))
+        return piece
+
+    def place_piece(self, piece, x, y):
+        self.board[y][x] = piece
+        self.squares[square(x, y)] = PIECE_CODES[piece.color, piece.piece_type]
+        self.bitboards.put(piece.color, piece.piece_type, square(x, y))
+        self.zobrist_key ^= piece_key(piece.color, piece.piece_type, square(x, y))
+
+    def record_position(self, key, count=1):
+        self.position_counts[key] = self.position_counts.get(key, 0) + count
+
+    def is_repetition(self, count=3):
+        return self.position_counts.get(self.zobrist_key, 0) >= count
+
+    def castling_rights(self):
+        rights = 0
+        for color, y in (('white', 7), ('black', 0)):
+            king = self.board[y][4]
+            if not isinstance(king, King) or king.color != color or king.has_moved:
+                continue
+            for x in (0, 7):
+                rook = self.board[y][x]
+                if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+                    rights |= 1 << square(x, y)
+        return rights
+
+    def en_passant_square(self):
+        if self.last_move is None:
+            return None
+        (from_x, from_y), (to_x, to_y) = self.last_move
+        if isinstance(self.board[to_y][to_x], Pawn) and abs(to_y - from_y) == 2:
+            return square(to_x, (from_y + to_y) // 2)
+        return None
+
+    def legal_moves(self, color=None):
+        # {square: destination bitboard} for every piece of one side that can
+        # move. Generated once per position; the key changes with every move.
+        color = color or self.current_player
+        key = (self.zobrist_key, color)
+        moves = self.move_cache.get(key)
+        if moves is None:
+            moves = self.bitboards.side_moves(color, self.castling_rights(), self.en_passant_square())
+            self.move_cache[key] = moves
         return moves
+
+    def get_move_set(self, x, y):
+        if self.board is None or self.board[y][x] is None:
+            return 0
+        return self.legal_moves(self.board[y][x].color).get(square(x, y), 0)
+
+    def get_possible_moves(self, x, y):
+        return [coords(sq) for sq in iter_squares(self.get_move_set(x, y))]
+
+    def get_all_moves(self, color=None):
+        if self.board is None:
+            return {}
+        return {coords(sq): [coords(to_sq) for to_sq in iter_squares(moves)]
+                for sq, moves in self.legal_moves(color).items()}
     
     def get_piece(self, x, y):
         if self.board is None:
             return None
         return self.board[y][x]
     
-    def add_move_to_history(self, coor1, coor2):
-        move = (coor1, coor2)
-        if len(self.move_history) >= self.max_history_length:
-            self.move_history.pop(0)
-        self.move_history.append(move)
-
     def vaild_move(self, from_x, from_y, to_x, to_y):
-        piece = self.get_piece(from_x, from_y)
-
-        if piece is not None and piece.move(self, from_x, from_y, to_x, to_y):
-            return True
-        return False
+        if not (0 <= to_x < 8 and 0 <= to_y < 8):
+            return False
+        return bool(self.get_move_set(from_x, from_y) >> square(to_x, to_y) & 1)
     
     def move_piece(self, from_x, from_y, to_x, to_y):
         if self.board is None:
             return False
-        
-        piece = self.get_piece(from_x, from_y)
 
         if self.vaild_move(from_x, from_y, to_x, to_y):
-            self.half_move_counter+=1
-            if self.board[to_y][to_x] is not None:
-                player_color = 'black' if self.current_player == 'white' else 'white'
+            captured = self.make_move(from_x, from_y, to_x, to_y)
+            if captured is not None:
+                player_color = 'black' if captured.color == 'white' else 'white'
                 player = Player(player_color)
-                player.captured_history(self.board[to_y][to_x])
-                self.half_move_counter = 0
-            self.board[to_y][to_x] = piece
-            self.board[from_y][from_x] = None
-
-            self.last_move = ((from_x, from_y), (to_x, to_y))
-            self.add_move_to_history((from_x, from_y), (to_x, to_y))
-
-            if isinstance(piece, King) and abs(to_x - from_x) == 2:
-                rook_from_x = 7 if to_x > from_x else 0
-                rook_to_x = (from_x + to_x) // 2
-                
-                rook = self.get_piece(rook_from_x, from_y)
-                self.board[from_y][rook_to_x] = rook
-                self.board[from_y][rook_from_x] = None
-
-            if isinstance(piece, Pawn) and abs(from_y - to_y) == 1 and abs(from_x - to_x) == 1:
-                self.board[from_y][to_x] = None
-            
+                player.captured_history(captured)
             return True
         else:
             return False
 
+    def make_move(self, from_x, from_y, to_x, to_y, promotion=None):
+        # Plays a legal move, hands the turn to the other side and pushes
+        # what unmake_move needs to take it back. Returns the captured piece.
+        piece = self.board[from_y][from_x]
+        captured_y = to_y
+        if piece.piece_type == 'pawn' and from_x != to_x and self.board[to_y][to_x] is None:
+            captured_y = from_y
+        captured = self.board[captured_y][to_x]
+        rook = None
+        if piece.piece_type == 'king' and abs(to_x - from_x) == 2:
+            rook = self.board[from_y][7 if to_x > from_x else 0]
+        self.undo_stack.append((from_x, from_y, to_x, to_y, piece, captured, captured_y, rook,
+                                getattr(piece, 'has_moved', None), self.last_move, self.half_move_counter,
+                                self.zobrist_key, self.move_cache))
+
+        self.zobrist_key ^= state_key(self.castling_rights(), self.en_passant_square(), self.bitboards,
+                                      self.zobrist_turn)
+        self.half_move_counter += 1
+        if captured is not None:
+            self.remove_piece(to_x, captured_y)
+            self.half_move_counter = 0
+        if piece.piece_type == 'pawn':
+            self.half_move_counter = 0
+        self.place_piece(self.remove_piece(from_x, from_y), to_x, to_y)
+        piece.moved()
+        if rook is not None:
+            self.remove_piece(7 if to_x > from_x else 0, from_y)
+            self.place_piece(rook, (from_x + to_x) // 2, from_y)
+            rook.moved()
+        if promotion is not None:
+            self.remove_piece(to_x, to_y)
+            self.place_piece(promoted_piece(piece.color, promotion), to_x, to_y)
+        self.last_move = ((from_x, from_y), (to_x, to_y))
+
+        if piece.color == 'black':
+            self.fullmove_number += 1
+        next_player = other(piece.color)
+        self.current_player = self.zobrist_turn = next_player
+        self.zobrist_key ^= state_key(self.castling_rights(), self.en_passant_square(), self.bitboards,
+                                      next_player)
+        self.record_position(self.zobrist_key)
+        self.move_cache = {}
+        return captured
+
+    def unmake_move(self):
+        (from_x, from_y, to_x, to_y, piece, captured, captured_y, rook, has_moved, last_move,
+         half_move_counter, zobrist_key, move_cache) = self.undo_stack.pop()
+        self.record_position(self.zobrist_key, -1)
+        # Whatever stands on the target square goes, a promoted piece included.
+        self.remove_piece(to_x, to_y)
+        self.place_piece(piece, from_x, from_y)
+        if captured is not None:
+            self.place_piece(captured, to_x, captured_y)
+        if rook is not None:
+            self.remove_piece((from_x + to_x) // 2, from_y)
+            self.place_piece(rook, 7 if to_x > from_x else 0, from_y)
+            rook.has_moved = False
+        if has_moved is not None:
+            piece.has_moved = has_moved
+
+        if piece.color == 'black':
+            self.fullmove_number -= 1
+        self.current_player = self.zobrist_turn = piece.color
+        self.last_move = last_move
+        self.half_move_counter = half_move_counter
+        self.zobrist_key = zobrist_key
+        self.move_cache = move_cache
+
+    def last_move_uci(self):
+        if not self.undo_stack:
+            return None
+        from_x, from_y, to_x, to_y, piece = self.undo_stack[-1][:5]
+        promoted = self.board[to_y][to_x]
+        suffix = PROMOTION_LETTERS[promoted.piece_type] if promoted is not piece else ''
+        return square_name(from_x, from_y) + square_name(to_x, to_y) + suffix
+
     def pawn_to_promote(self):
         if self.board is None:
             return None, None
 
-        for y, row in enumerate(self.board):
-            if y == 0 or y == 7:
-                for x, piece in enumerate(row):
-                    if isinstance(piece, Pawn):
-                        return x, y
+        for sq in (*range(8), *range(56, 64)):
+            if self.squares[sq] in PAWN_CODES:
+                return coords(sq)
         return None, None
 
     def promote_pawn(self, x, y, piece_type):
@@ -113,10 +367,19 @@ class Board:
         piece = self.get_piece(x, y)
         if piece is None:
             return
-        self.board[y][x] = self.create_piece(piece.color, piece_type, x, y)
-
-    def create_piece(self, color, piece_type, x, y):
-        if piece_type == 'queen':
+        self.record_position(self.zobrist_key, -1)
+        self.remove_piece(x, y)
+        self.place_piece(self.create_piece(piece.color, piece_type, x, y), x, y)
+        self.record_position(self.zobrist_key)
+        self.move_cache = {}
+
+    @staticmethod
+    def create_piece(color, piece_type, x, y):
+        if piece_type == 'pawn':
+            return Pawn(color, x, y)
+        elif piece_type == 'king':
+            return King(color, x, y)
+        elif piece_type == 'queen':
             return Queen(color, x, y)
         elif piece_type == 'rook':
             return Rook(color, x, y)
@@ -126,131 +389,122 @@ class Board:
             return Knight(color, x, y)
 
     def draw(self, screen):
+        # Returns the rects that changed so the caller can update only those.
         if self.board is None:
-            return
+            return []
         square_size = SCREEN_SIZE[1] // 8
-
-        for y, x in [(y, x) for y in range(8) for x in range(8)]:
-            rect = pygame.Rect(x * square_size, y * square_size, square_size, square_size)
-            pygame.draw.rect(screen, WHITE if (x + y) % 2 == 0 else GRAY, rect)
-            
-            piece = self.board[y][x]
-            if piece:
-                piece_image = piece_images[f"{piece.color}_{piece.piece_type}"]
-                piece_rect = piece_image.get_rect()
-                piece_rect.center = rect.center
-                screen.blit(piece_image, piece_rect)
-
-                if self.selected_piece and self.selected_piece == (x, y):
-                    pygame.draw.rect(screen, RED, rect, 4)
-
+        background = checkerboard(square_size)
+        highlights = set()
         if self.selected_piece:
-            possible_moves = self.get_possible_moves(*self.selected_piece)
-            for move_x, move_y in possible_moves:
-                highlight_surface = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
-                highlight_surface.fill((0, 0, 0, 0))
-                pygame.draw.rect(highlight_surface, LIGHT_BLUE + (100,), (0, 0, square_size, square_size), 0)
-                screen.blit(highlight_surface, (move_x * square_size, move_y * square_size))
-
-        pygame.display.update()
+            highlights = set(self.get_possible_moves(*self.selected_piece))
+
+        full_redraw = self.drawn_squares is None
+        if full_redraw:
+            screen.blit(background, (0, 0))
+            self.drawn_squares = [None] * 64
+
+        dirty_rects = []
+        for y in range(8):
+            for x in range(8):
+                state = (PIECE_NAMES[self.squares[y * 8 + x]], self.selected_piece == (x, y), (x, y) in highlights,
+                         self.hint is not None and (x, y) in self.hint)
+                if state == self.drawn_squares[y * 8 + x]:
+                    continue
+                self.drawn_squares[y * 8 + x] = state
+                image_key, selected, highlighted, hinted = state
+
+                rect = pygame.Rect(x * square_size, y * square_size, square_size, square_size)
+                screen.blit(background, rect, rect)
+                if image_key:
+                    sprite_cache.blit(screen, image_key, rect)
+                    if selected:
+                        pygame.draw.rect(screen, RED, rect, 4)
+                if highlighted:
+                    screen.blit(highlight_surface(square_size), rect)
+                if hinted:
+                    pygame.draw.rect(screen, LIGHT_BLUE, rect, 4)
+                dirty_rects.append(rect)
+
+        if full_redraw:
+            return [pygame.Rect(0, 0, square_size * 8, square_size * 8)]
+        return dirty_rects
+
+    def invalidate(self):
+        # Something else painted over the board; redraw every square next frame.
+        self.drawn_squares = None
 
     def draw_extra_area(self, screen):
         extra_area_width = SCREEN_SIZE[0] - SCREEN_SIZE[1]
         extra_area_height = SCREEN_SIZE[1]
         extra_area_rect = pygame.Rect(SCREEN_SIZE[1], 0, extra_area_width, extra_area_height)
         pygame.draw.rect(screen, (240, 240, 240), extra_area_rect)
+        return extra_area_rect
 
     def select_piece(self, x, y):
         piece = self.get_piece(x, y)
 
-        if piece is not None and piece.color == self.current_player:
+        if piece is not None and piece.color == self.current_player and square(x, y) in self.legal_moves():
             self.selected_piece = (x, y)
             return True
         
         return False
 
     def is_king_captured(self, opponent):
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(col, row)
-                if isinstance(piece, King) and piece.color == opponent:
-                    return False
-        return True
-
-    def square_attacked(self, x, y):
-        piece = self.get_piece(x, y)
-        if piece is None:
-            return False
-        for row in range(8):
-            for col in range(8):
-                if piece.color != self.current_player and self.vaild_move(col, row, x, y):
-                    return True
-        return False
+        return not self.bitboards.pieces[opponent]['king']
+
+    def square_attacked(self, x, y, by_color=None):
+        if by_color is None:
+            piece = self.get_piece(x, y)
+            by_color = other(piece.color if piece is not None else self.current_player)
+        return self.bitboards.is_attacked(square(x, y), by_color)
 
     def is_in_check(self, board=None):
         if board is None:
             board = self
+        return board.bitboards.in_check(board.current_player)
 
-        king_position = None
-        for y, row in enumerate(self.board):
-            for x, piece in enumerate(row):
-                if isinstance(piece, King) and piece.color == self.current_player:
-                    king_position = (x, y)
-                    break
-            if king_position:
-                break
-
-        if king_position is None:
-            return False
+    def has_legal_moves(self, color=None):
+        return bool(self.legal_moves(color))
 
-        return self.square_attacked(*king_position)
+    def tablebase_result(self):
+        # (wdl, plies to mate) for the side to move, when a table covers the position.
+        if not self.tablebases:
+            return None
+        kings = self.bitboards.pieces['white']['king'] | self.bitboards.pieces['black']['king']
+        others = self.bitboards.all_occupied() & ~kings
+        if popcount(kings) != 2 or popcount(others) != 1:
+            return None
+        sq = others.bit_length() - 1
+        piece = self.board[sq >> 3][sq & 7]
+        # The tables number squares from a1, the board from a8.
+        return self.tablebases.probe_pieces(self.current_player == 'white',
+                                            self.bitboards.king_square('white') ^ 56,
+                                            self.bitboards.king_square('black') ^ 56,
+                                            PIECE_TYPES.index(piece.piece_type) + 1, piece.color == 'white', sq ^ 56)
 
     def checkmate(self):
-        if not self.is_in_check():
-            return False
-
-        for y, row in enumerate(self.board):
-            for x, piece in enumerate(row):
-                if piece is not None and piece.color == self.current_player:
-                    valid_moves = self.get_possible_moves(x, y)
-                    if any(self.vaild_move(x, y, *move) for move in valid_moves):
-                        return False
-
-        return True
+        return self.is_in_check() and not self.has_legal_moves()
 
     def stalemate(self):
-        if len(self.move_history) >= 8:
-            if self.move_history[-1] == self.move_history[-5] and self.move_history[-3] == self.move_history[-7] and \
-                    self.move_history[-2] == self.move_history[-6] and self.move_history[-4] == self.move_history[-8]:
-                return True
+        if self.is_repetition():
+            return True
 
         if self.half_move_counter >= 100:
             return True
 
-        kings_count = 0
-        pieces_count = 0
-        for row in self.board:
-            for piece in row:
-                if isinstance(piece, King):
-                    kings_count += 1
-                if piece is not None:
-                    pieces_count += 1
-        if kings_count == 2 and pieces_count == 2:
+        kings = self.bitboards.pieces['white']['king'] | self.bitboards.pieces['black']['king']
+        if popcount(kings) == 2 and self.bitboards.all_occupied() == kings:
             return True
 
-        current_player_in_check = self.is_in_check()
-        has_valid_moves = False
-        for y, row in enumerate(self.board):
-            for x, piece in enumerate(row):
-                if piece is not None and piece.color == self.current_player:
-                    valid_moves = self.get_possible_moves(x, y)
-                    if any(self.vaild_move(x, y, *move) for move in valid_moves):
-                        has_valid_moves = True
-                        break
-            if has_valid_moves:
-                break
-
-        if not current_player_in_check and not has_valid_moves:
-            return True
+        return not self.is_in_check() and not self.has_legal_moves()
 
-        return False
+    def adjudicated_result(self):
+        # 'white', 'black' or 'draw' when a table knows how the game ends with
+        # best play, though it can still be played out; None otherwise.
+        result = self.tablebase_result()
+        if result is None:
+            return None
+        if result[0] == 0:
+            return 'draw'
+        opponent = 'black' if self.current_player == 'white' else 'white'
+        return self.current_player if result[0] > 0 else opponent
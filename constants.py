@@ -1,5 +1,3 @@
-import pygame
-
 SCREEN_SIZE = (1000, 640)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -16,7 +14,19 @@ FONTS_SIZE = int(SCREEN_SIZE[1] * 0.05)
 BUTTON_WIDTH = int(SCREEN_SIZE[0] * BUTTON_WIDTH_RATIO)
 BUTTON_HEIGHT = int(SCREEN_SIZE[1] * BUTTON_HEIGHT_RATIO)
 
-piece_images = {}
+AI_SEARCH_DEPTH = 6
+AI_TIME_LIMIT = 3.0
+# Polyglot opening book, used when the file exists.
+AI_BOOK_PATH = 'book.bin'
+# Endgame tables from tools.build_tablebases (and any Syzygy files), used when the directory exists.
+AI_TABLEBASE_PATH = 'tablebases'
+# Persistent analysis cache (SQLite) shared between sessions; off unless a path
+# is set here or given with main.py --cache.
+AI_CACHE_PATH = None
+
+# Piece sprites are scaled to this fraction of a board square.
+PIECE_SCALE = 0.8
+
 pieces = {
     'white_pawn':   ('white', 'pawn'),
     'white_rook':   ('white', 'rook'),
@@ -32,6 +42,3 @@ pieces = {
     'black_king':   ('black', 'king')
 }
 
-for key, (color, name) in pieces.items():
-    piece_images[key] = pygame.image.load(f"image/{color}_{name}.png")
-
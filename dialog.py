@@ -64,8 +64,8 @@ class Dialog:
             {"label": "Queen", "action": "queen"},
         ]
         action = self.show_message(dialog, options)
-        if action:
-            board.promote_pawn(x, y, action)
+        # Closing the dialog still has to promote; a pawn cannot stay on the last rank.
+        board.promote_pawn(x, y, action or 'queen')
 
     def show_proposal(self):
         dialog = "Your opponent has offered a draw. Do you accept?"
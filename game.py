@@ -1,14 +1,20 @@
+import os
+import chess
 import pygame
 from pygame import mixer
 from board import Board
-from constants import SCREEN_SIZE, FONTS_SIZE, BUTTON_WIDTH, BUTTON_HEIGHT
+from bitboard import coords
+from constants import (SCREEN_SIZE, FONTS_SIZE, BUTTON_WIDTH, BUTTON_HEIGHT, AI_SEARCH_DEPTH, AI_TIME_LIMIT,
+                       AI_BOOK_PATH, AI_TABLEBASE_PATH, AI_CACHE_PATH)
 from dialog import Dialog
 from player import Player
 from AI.minimax import Ai
+from AI.tablebase import Tablebases
+from AI.worker import SearchWorker
 
 
 class Game:
-    def __init__(self, screen):
+    def __init__(self, screen, cache_path=AI_CACHE_PATH):
         self.screen = screen
         self.overlay = pygame.Surface(SCREEN_SIZE, pygame.SRCALPHA)
         self.clock = pygame.time.Clock()
@@ -19,7 +25,12 @@ class Game:
         self.current_player = self.players[self.current_player_index].color
 
         self.board = Board(self.current_player)
-        self.ai = Ai()
+        self.ai = Ai(book_path=AI_BOOK_PATH if os.path.exists(AI_BOOK_PATH) else None,
+                     tablebase_path=AI_TABLEBASE_PATH if os.path.isdir(AI_TABLEBASE_PATH) else None,
+                     cache_path=cache_path)
+        # A handle of its own: the engine probes its tables from the search thread.
+        self.board.tablebases = Tablebases(AI_TABLEBASE_PATH) if os.path.isdir(AI_TABLEBASE_PATH) else None
+        self.search_worker = SearchWorker(self.ai)
         self.scan_flag = False
         self.dialog = Dialog(self.screen)
 
@@ -34,19 +45,25 @@ class Game:
         return screen_x // self.square_size, screen_y // self.square_size
     
     def draw_board(self):
-        self.board.draw(self.screen)
-        self.board.draw_extra_area(self.screen)
-        self.dialog.draw_button(self.button_rect, self.button_text)
+        dirty_rects = []
+        if self.board.drawn_squares is None:
+            dirty_rects.append(self.board.draw_extra_area(self.screen))
+            self.dialog.draw_button(self.button_rect, self.button_text)
+        dirty_rects.extend(self.board.draw(self.screen))
+        return dirty_rects
 
     def handle_click(self, pos):
         x, y = self.screen_to_board_coords(*pos)
         if self.button_rect.collidepoint(x, y):
             if self.dialog.show_proposal():
                 self.dialog.show_message("Draw!")
+                self.search_worker.cancel()
                 self.board.reset_board()
+                self.ai.chess_board.reset()
+            self.board.invalidate()
 
         if not (0 <= x < 8) or not (0 <= y < 8):
-            return
+            return False
         piece = self.board.get_piece(x, y)
         
         if self.board.selected_piece is None:
@@ -65,6 +82,7 @@ class Game:
                     self.board.current_player = self.current_player
                     self.board.selected_piece = None
 
+                    adjudicated = self.board.adjudicated_result()
                     if self.board.stalemate():
                         self.dialog.show_message("Draw!")
                     elif self.board.checkmate():
@@ -77,11 +95,28 @@ class Game:
                             self.dialog.show_message("Black Wins!")
                         else:
                             self.dialog.show_message("White Wins!")
+                    elif adjudicated == 'draw':
+                        self.dialog.show_message("Draw!")
+                    elif adjudicated is not None:
+                        self.dialog.show_message(f"{adjudicated.capitalize()} Wins!")
 
                     pawn_to_promote = self.board.pawn_to_promote()
                     if pawn_to_promote[0] is not None and pawn_to_promote[1] is not None:
                         x, y = pawn_to_promote
                         self.dialog.show_promotion(x, y, self.board)
+                    # The engine searches its own copy of the game; keep it in step.
+                    self.search_worker.cancel()
+                    self.board.hint = None
+                    move = chess.Move.from_uci(self.board.last_move_uci())
+                    if self.ai.chess_board.is_legal(move):
+                        self.ai.chess_board.push(move)
+                    else:
+                        # Out of step already; take the GUI's position rather than search a stale one.
+                        self.ai.chess_board.set_fen(self.board.fen())
+                    # Dialogs paint over the board and sidebar.
+                    self.board.invalidate()
+                    return True
+        return False
 
     def run(self):
         while self.running:
@@ -89,20 +124,29 @@ class Game:
                 if event.type == pygame.QUIT:
                     self.running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:
-                        self.handle_click(event.pos)
+                    if event.button == 1 and self.handle_click(event.pos):
                         self.scan_flag = True
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.board.invalidate()
 
-            self.draw_board()
+            dirty_rects = self.draw_board()
             if self.scan_flag:
-                best_move = self.ai.get_best_move(depth=6)
-                if best_move is not None:
-                    self.ai.chess_board.push(best_move)
+                self.search_worker.start(depth=AI_SEARCH_DEPTH, time_limit=AI_TIME_LIMIT)
                 self.scan_flag = False
-            
-            pygame.display.flip()
+
+            done, best_move = self.search_worker.poll()
+            if done and best_move is not None:
+                # Shown as a hint for the side to move; python-chess squares count from a1.
+                self.board.hint = (coords(best_move.from_square ^ 56), coords(best_move.to_square ^ 56))
+
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
             self.clock.tick(30)
 
+        self.search_worker.cancel()
+        self.ai.close()
+        if self.board.tablebases is not None:
+            self.board.tablebases.close()
         pygame.quit()
 
     def change_music(self, music_file):
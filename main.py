@@ -1,9 +1,10 @@
+import argparse
 import sys
 import pygame
 import pygame.mixer as mixer
 from menu import Menu
 from game import Game
-from constants import SCREEN_SIZE
+from constants import SCREEN_SIZE, AI_CACHE_PATH
 
 
 def run_menu(screen):
@@ -20,6 +21,11 @@ def run_menu(screen):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Chess game")
+    parser.add_argument('--cache', default=AI_CACHE_PATH,
+                        help="keep the engine's analysis in this SQLite file between sessions")
+    args = parser.parse_args()
+
     pygame.init()
 
     icon = pygame.image.load('image/icon.png')
@@ -29,7 +35,7 @@ def main():
 
     run_menu(screen)
 
-    game = Game(screen)
+    game = Game(screen, cache_path=args.cache)
     game.change_music('music/fighting.mp3')
     game.run()
 
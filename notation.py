@@ -0,0 +1,205 @@
+import re
+from board import Board, FEN_PIECES, FEN_LETTERS
+from bitboard import square, coords, square_name, iter_squares
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+PROMOTION_PIECES = {'Q': 'queen', 'R': 'rook', 'B': 'bishop', 'N': 'knight'}
+SAN_PATTERN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+TOKEN_PATTERN = re.compile(r'\{[^}]*\}?|;[^\n]*|\(|\)|\$\d+|\d+\.+|[^\s(){};]+')
+
+
+class NotationError(ValueError):
+    pass
+
+
+class PgnGame:
+    def __init__(self, headers=None, moves=None, result='*'):
+        self.headers = headers if headers is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+
+    def board(self):
+        if 'FEN' in self.headers:
+            return Board.from_fen(self.headers['FEN'])
+        return Board('white')
+
+    def positions(self):
+        # Plays the game on a Board, yielding it after every move.
+        board = self.board()
+        for ply, san in enumerate(self.moves):
+            try:
+                move = parse_san(board, san)
+            except NotationError as error:
+                raise NotationError(f"ply {ply + 1} ({san}): {error}") from None
+            board.make_move(*move)
+            yield board
+
+
+def parse_square(name):
+    return ord(name[0]) - ord('a'), 8 - int(name[1])
+
+
+def movers(board, color, piece_type, to_x, to_y):
+    # Squares of the pieces of one type that can legally move to (to_x, to_y).
+    # Only those pieces are generated, not the whole side's move list.
+    bitboards = board.bitboards
+    to_sq = square(to_x, to_y)
+    rights, en_passant = board.castling_rights(), board.en_passant_square()
+    return [coords(sq) for sq in iter_squares(bitboards.pieces[color][piece_type])
+            if bitboards.pseudo_moves(sq, color, piece_type, rights, en_passant) >> to_sq & 1
+            and bitboards.leaves_king_safe(sq, to_sq, color, piece_type, en_passant)]
+
+
+def parse_san(board, san):
+    # Returns make_move's arguments for a SAN move that is legal on the board.
+    text = san.rstrip('+#!?')
+    color = board.current_player
+    home_y = 7 if color == 'white' else 0
+
+    if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        to_x = 6 if len(text) == 3 else 2
+        if (4, home_y) not in movers(board, color, 'king', to_x, home_y):
+            raise NotationError("castling is not legal here")
+        return 4, home_y, to_x, home_y, None
+
+    match = SAN_PATTERN.match(text)
+    if match is None:
+        raise NotationError("not a SAN move")
+    letter, from_file, from_rank, destination, promotion = match.groups()
+    piece_type = FEN_PIECES[letter.lower()] if letter else 'pawn'
+    to_x, to_y = parse_square(destination)
+    if (piece_type == 'pawn' and to_y in (0, 7)) != (promotion is not None):
+        raise NotationError("wrong promotion")
+
+    candidates = []
+    for from_x, from_y in movers(board, color, piece_type, to_x, to_y):
+        if from_file is not None and from_x != ord(from_file) - ord('a'):
+            continue
+        if from_rank is not None and from_y != 8 - int(from_rank):
+            continue
+        candidates.append((from_x, from_y))
+    if not candidates:
+        raise NotationError("no legal move matches")
+    if len(candidates) > 1:
+        raise NotationError("ambiguous move")
+    from_x, from_y = candidates[0]
+    return from_x, from_y, to_x, to_y, PROMOTION_PIECES.get(promotion)
+
+
+def move_to_san(board, from_x, from_y, to_x, to_y, promotion=None):
+    piece = board.board[from_y][from_x]
+    if piece.piece_type == 'king' and abs(to_x - from_x) == 2:
+        text = 'O-O' if to_x > from_x else 'O-O-O'
+    elif piece.piece_type == 'pawn':
+        text = square_name(to_x, to_y)
+        if from_x != to_x:
+            text = 'abcdefgh'[from_x] + 'x' + text
+        if promotion is not None:
+            text += '=' + FEN_LETTERS[promotion].upper()
+    else:
+        # Name the file, else the rank, else both, when another piece of the
+        # same kind could also reach the square.
+        rivals = [rival for rival in movers(board, piece.color, piece.piece_type, to_x, to_y)
+                  if rival != (from_x, from_y)]
+        prefix = ''
+        if rivals:
+            if all(x != from_x for x, _ in rivals):
+                prefix = 'abcdefgh'[from_x]
+            elif all(y != from_y for _, y in rivals):
+                prefix = str(8 - from_y)
+            else:
+                prefix = square_name(from_x, from_y)
+        capture = 'x' if board.board[to_y][to_x] is not None else ''
+        text = FEN_LETTERS[piece.piece_type].upper() + prefix + capture + square_name(to_x, to_y)
+
+    board.make_move(from_x, from_y, to_x, to_y, promotion)
+    if board.is_in_check():
+        text += '+' if board.has_legal_moves() else '#'
+    board.unmake_move()
+    return text
+
+
+def read_games(lines):
+    # Streams games from any iterable of lines, such as an open file.
+    headers = {}
+    movetext = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('[') and not movetext_open(movetext):
+            if movetext:
+                yield parse_movetext(headers, movetext)
+                headers, movetext = {}, []
+            key, _, value = stripped[1:-1].partition(' ')
+            headers[key] = value.strip().strip('"')
+        elif stripped or movetext:
+            movetext.append(line)
+            if stripped and stripped.split()[-1] in RESULTS and not movetext_open(movetext):
+                yield parse_movetext(headers, movetext)
+                headers, movetext = {}, []
+    if headers or any(line.strip() for line in movetext):
+        yield parse_movetext(headers, movetext)
+
+
+def movetext_open(movetext):
+    # True inside an unclosed comment, where '[' and results are just text.
+    text = ''.join(movetext)
+    return text.count('{') > text.count('}')
+
+
+def parse_movetext(headers, movetext):
+    game = PgnGame(headers, result=headers.get('Result', '*'))
+    depth = 0
+    for token in TOKEN_PATTERN.findall(''.join(movetext)):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(0, depth - 1)
+        elif depth or token[0] in '{;$' or token[0].isdigit() and token.endswith('.'):
+            continue
+        elif token in RESULTS:
+            game.result = token
+        else:
+            game.moves.append(token)
+    return game
+
+
+def write_game(output, headers, sans, result='*', start_fullmove=1, black_first=False):
+    for key, value in headers.items():
+        output.write(f'[{key} "{value}"]\n')
+    output.write('\n')
+    tokens = []
+    number = start_fullmove
+    for index, san in enumerate(sans):
+        white_move = (index % 2 == 0) != black_first
+        if white_move:
+            tokens.append(f"{number}.")
+        elif index == 0:
+            tokens.append(f"{number}...")
+        tokens.append(san)
+        if not white_move:
+            number += 1
+    tokens.append(result)
+
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 79:
+            output.write(line + '\n')
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    output.write(line + '\n\n')
+
+
+def write_pgn(output, game):
+    # Writes a PgnGame with its moves re-rendered from the board, so that the
+    # output is canonical SAN whatever the input looked like.
+    board = game.board()
+    start_fullmove, black_first = board.fullmove_number, board.current_player == 'black'
+    sans = []
+    for san in game.moves:
+        move = parse_san(board, san)
+        sans.append(move_to_san(board, *move))
+        board.make_move(*move)
+    headers = dict(game.headers)
+    headers['Result'] = game.result
+    write_game(output, headers, sans, game.result, start_fullmove, black_first)
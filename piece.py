@@ -1,4 +1,9 @@
+from bitboard import other, square
+
+
 class Piece():
+    __slots__ = ('color', 'piece_type', 'x', 'y')
+
     def __init__(self, color, piece_type, x, y):
         self.color = color
         self.piece_type = piece_type
@@ -13,6 +18,8 @@ class Piece():
 
 
 class Pawn(Piece):
+    __slots__ = ()
+
     def __init__(self, color, x, y):
         super().__init__(color, 'pawn', x, y)
 
@@ -37,10 +44,11 @@ class Pawn(Piece):
                 last_moved_piece_start_y = 6 if last_piece.color == 'white' else 1
                 if (
                     abs(from_x - last_move[1][0]) == 1
+                    and from_y == last_move[1][1]
                     and last_move[0][1] == last_moved_piece_start_y
-                    and last_move[1][1] == last_moved_piece_start_y + 2 * direction
+                    and last_move[1][1] == last_moved_piece_start_y - 2 * direction
                     and to_x == last_move[1][0]
-                    and to_y == last_moved_piece_start_y
+                    and to_y == last_moved_piece_start_y - direction
                 ):
                     return True
 
@@ -48,6 +56,8 @@ class Pawn(Piece):
 
 
 class Rook(Piece):
+    __slots__ = ('has_moved',)
+
     def __init__(self, color, x, y):
         super().__init__(color, 'rook', x, y)
         self.has_moved = False
@@ -63,20 +73,20 @@ class Rook(Piece):
             direction_y = 1 if to_y > from_y else -1
             if any(board.get_piece(from_x, y) is not None for y in range(from_y + direction_y, to_y, direction_y)):
                 return False
-            self.moved()
             return target_piece is None or target_piece.color != self.color
 
         if from_y == to_y and from_x != to_x:
             direction_x = 1 if to_x > from_x else -1
             if any(board.get_piece(x, from_y) is not None for x in range(from_x + direction_x, to_x, direction_x)):
                 return False
-            self.moved()
             return target_piece is None or target_piece.color != self.color
 
         return False
 
 
 class Knight(Piece):
+    __slots__ = ()
+
     def __init__(self, color, x, y):
         super().__init__(color, 'knight', x, y)
 
@@ -91,6 +101,8 @@ class Knight(Piece):
 
 
 class Bishop(Piece):
+    __slots__ = ()
+
     def __init__(self, color, x, y):
         super().__init__(color, 'bishop', x, y)
 
@@ -121,18 +133,24 @@ class Bishop(Piece):
 
 
 class Queen(Piece):
+    __slots__ = ()
+
     def __init__(self, color, x, y):
         super().__init__(color, 'queen', x, y)
 
     def move(self, board, from_x, from_y, to_x, to_y):
+        # The rook and bishop rules only read the mover's color, so they can
+        # run on the queen itself rather than on a throwaway piece.
         if from_x == to_x or from_y == to_y:
-            return Rook(self.color, from_x, from_y).move(board, from_x, from_y, to_x, to_y)
+            return Rook.move(self, board, from_x, from_y, to_x, to_y)
         elif abs(from_x - to_x) == abs(from_y - to_y):
-            return Bishop(self.color, from_x, from_y).move(board, from_x, from_y, to_x, to_y)
+            return Bishop.move(self, board, from_x, from_y, to_x, to_y)
         return False
 
 
 class King(Piece):
+    __slots__ = ('has_moved',)
+
     def __init__(self, color, x, y):
         super().__init__(color, 'king', x, y)
         self.has_moved = False
@@ -147,8 +165,7 @@ class King(Piece):
         dx = abs(from_x - to_x)
         dy = abs(from_y - to_y)
 
-        if dx <= 1 and dy <= 1 and (target_piece is None or target_piece.color != self.color) and not board.square_attacked(to_x, to_y):
-            self.moved()
+        if dx <= 1 and dy <= 1 and (target_piece is None or target_piece.color != self.color) and not self.attacked_after_move(board, from_x, from_y, to_x, to_y, target_piece):
             return True
 
         if self.castling(board, from_x, from_y, to_x, to_y):
@@ -156,9 +173,14 @@ class King(Piece):
 
         return False
 
+    def attacked_after_move(self, board, from_x, from_y, to_x, to_y, target_piece):
+        # The king no longer blocks a slider that checks it along the line it steps on.
+        occupied = board.bitboards.all_occupied() & ~(1 << square(from_x, from_y))
+        captured = 1 << square(to_x, to_y) if target_piece is not None else 0
+        return board.bitboards.is_attacked(square(to_x, to_y), other(self.color), occupied, captured)
+
     def castling(self, board, from_x, from_y, to_x, to_y):
-        piece = board.get_piece(to_x, to_y)
-        if not isinstance(piece, King) or piece.has_moved:
+        if self.has_moved or board.get_piece(from_x, from_y) is not self:
             return False
 
         if abs(from_x - to_x) != 2 or from_y != to_y:
@@ -174,11 +196,10 @@ class King(Piece):
         if not isinstance(rook, Rook) or rook.has_moved:
             return False
 
-        for x in range(from_x + step, rook_x, step):
-            if board.get_piece(x, from_y) is not None or board.square_attacked(x, from_y):
-                return False
+        if any(board.get_piece(x, from_y) is not None for x in range(from_x + step, rook_x, step)):
+            return False
 
-        if board.square_attacked(from_x, from_y) or board.square_attacked(to_x, to_y):
+        if any(board.square_attacked(x, from_y, other(self.color)) for x in (from_x, from_x + step, to_x)):
             return False
 
         return True
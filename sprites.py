@@ -0,0 +1,55 @@
+import pygame
+from constants import pieces, PIECE_SCALE
+
+
+class SpriteCache:
+    def __init__(self, use_atlas=False):
+        self.use_atlas = use_atlas
+        self.images = {}
+        self.sprites = {}
+        self.atlas = None
+        self.atlas_rects = {}
+        self.square_size = None
+
+    def load_images(self):
+        for key, (color, name) in pieces.items():
+            self.images[key] = pygame.image.load(f"image/{color}_{name}.png")
+
+    def prepare(self, square_size):
+        # Must run after the display exists: converting to the display's
+        # pixel format is what makes the per-frame blits cheap.
+        if not self.images:
+            self.load_images()
+        size = int(square_size * PIECE_SCALE)
+        converted = pygame.display.get_surface() is not None
+
+        self.sprites = {}
+        for key, image in self.images.items():
+            if converted:
+                image = image.convert_alpha()
+            if image.get_size() != (size, size):
+                image = pygame.transform.smoothscale(image, (size, size))
+            self.sprites[key] = image
+
+        self.atlas = None
+        self.atlas_rects = {}
+        if self.use_atlas:
+            self.atlas = pygame.Surface((size * len(self.sprites), size), pygame.SRCALPHA)
+            if converted:
+                self.atlas = self.atlas.convert_alpha()
+            for index, (key, sprite) in enumerate(self.sprites.items()):
+                self.atlas_rects[key] = pygame.Rect(index * size, 0, size, size)
+                self.atlas.blit(sprite, self.atlas_rects[key])
+        self.square_size = square_size
+
+    def blit(self, screen, key, square_rect):
+        if square_rect.width != self.square_size:
+            self.prepare(square_rect.width)
+        sprite = self.sprites[key]
+        position = sprite.get_rect(center=square_rect.center)
+        if self.atlas is not None:
+            return screen.blit(self.atlas, position, self.atlas_rects[key])
+        return screen.blit(sprite, position)
+
+
+sprite_cache = SpriteCache()
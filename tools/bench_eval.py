@@ -0,0 +1,109 @@
+import argparse
+import random
+import time
+import chess
+from AI.evaluation import Evaluator
+
+
+def count_evaluate(board):
+    # The original Ai.evaluate: a piece count built from twelve square sets.
+    score = 0
+    for piece_type in chess.PIECE_TYPES:
+        score += len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK))
+    return score
+
+
+def sample_lines(games, plies, seed):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(games):
+        board = chess.Board()
+        line = []
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            line.append(move)
+            board.push(move)
+        lines.append(line)
+    return lines
+
+
+def bench_count(lines):
+    evals = 0
+    started = time.perf_counter()
+    for line in lines:
+        board = chess.Board()
+        for move in line:
+            board.push(move)
+            count_evaluate(board)
+            evals += 1
+    return evals, time.perf_counter() - started
+
+
+def bench_incremental(lines):
+    evals = 0
+    # One evaluator reset per game, as the search does; building one allocates its pawn table.
+    evaluator = Evaluator()
+    started = time.perf_counter()
+    for line in lines:
+        board = chess.Board()
+        evaluator.reset(board)
+        for move in line:
+            evaluator.push(board, move)
+            board.push(move)
+            evaluator.score()
+            evals += 1
+    return evals, time.perf_counter() - started
+
+
+def check_symmetry(lines):
+    # A position and its colour mirror must score exactly opposite.
+    evaluator = Evaluator()
+    positions = 0
+    for line in lines:
+        board = chess.Board()
+        for move in line:
+            board.push(move)
+            evaluator.reset(board)
+            score = evaluator.score()
+            evaluator.reset(board.mirror())
+            mirrored = evaluator.score()
+            if score != -mirrored:
+                raise AssertionError(f"{board.fen()}: {score}, mirrored {mirrored}")
+            positions += 1
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluation throughput benchmark")
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--plies', type=int, default=80)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check-symmetry', action='store_true',
+                        help="also check that every sampled position scores opposite to its colour mirror")
+    args = parser.parse_args()
+
+    lines = sample_lines(args.games, args.plies, args.seed)
+    if args.check_symmetry:
+        print(f"colour symmetry: {check_symmetry(lines)} positions ok")
+    print(f"{'evaluator':>16} {'evals':>8} {'time (s)':>9} {'evals/s':>10}")
+    # Updated and scored after every move of random games; most pawn structures are new here.
+    for name, bench in (('count', bench_count), ('incremental', bench_incremental)):
+        evals, elapsed = bench(lines)
+        print(f"{name + ' move':>16} {evals:>8} {elapsed:>9.3f} {evals / elapsed:>10.0f}")
+
+    # Leaf evaluation alone, without the cost of making the move.
+    board = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    evaluator = Evaluator(board)
+    for name, evaluate in (('count', lambda: count_evaluate(board)), ('incremental', evaluator.score)):
+        started = time.perf_counter()
+        for _ in range(100000):
+            evaluate()
+        elapsed = time.perf_counter() - started
+        print(f"{name + ' leaf':>16} {100000:>8} {elapsed:>9.3f} {100000 / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
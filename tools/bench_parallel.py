@@ -0,0 +1,47 @@
+import argparse
+import time
+import chess
+from AI.parallel import ParallelSearch
+
+BENCH_POSITIONS = [
+    chess.STARTING_FEN,
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2QKB1R w KQ - 0 8",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def bench(workers, depth, positions):
+    nodes = 0
+    depth_times = [0.0] * depth
+    started = time.perf_counter()
+    with ParallelSearch(workers) as search:
+        for fen in positions:
+            search.get_best_move(chess.Board(fen), depth=depth)
+            nodes += search.nodes
+            for index, elapsed in enumerate(search.depth_times):
+                depth_times[index] += elapsed
+    elapsed = time.perf_counter() - started
+    return nodes, elapsed, depth_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel search scaling benchmark")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    baseline = None
+    depth_columns = ' '.join(f"{'d' + str(depth):>7}" for depth in range(1, args.depth + 1))
+    print(f"{'workers':>8} {'nodes':>10} {'time (s)':>10} {'nodes/s':>10} {'speedup':>8}  time to depth: {depth_columns}")
+    for workers in args.workers:
+        nodes, elapsed, depth_times = bench(workers, args.depth, BENCH_POSITIONS)
+        baseline = baseline or elapsed
+        times = ' '.join(f"{seconds:>7.2f}" for seconds in depth_times)
+        print(f"{workers:>8} {nodes:>10} {elapsed:>10.2f} {nodes / elapsed:>10.0f} {baseline / elapsed:>8.2f}"
+              f"                 {times}")
+
+
+if __name__ == '__main__':
+    main()
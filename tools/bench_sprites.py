@@ -0,0 +1,70 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import subprocess
+import sys
+import time
+import pygame
+from constants import SCREEN_SIZE, pieces
+from sprites import SpriteCache
+
+
+def import_time(module):
+    # A fresh interpreter, so nothing is already imported or cached.
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    return float(subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ)).decode().split()[-1])
+
+
+def load_time():
+    # What importing constants used to cost: loading every piece image.
+    started = time.perf_counter()
+    for color, name in pieces.values():
+        pygame.image.load(f"image/{color}_{name}.png")
+    return time.perf_counter() - started
+
+
+def bench_blits(screen, blit, blits):
+    keys = list(pieces)
+    square_size = SCREEN_SIZE[1] // 8
+    rects = [pygame.Rect(x * square_size, y * square_size, square_size, square_size)
+             for y in range(8) for x in range(8)]
+    started = time.perf_counter()
+    for index in range(blits):
+        blit(screen, keys[index % len(keys)], rects[index % len(rects)])
+    return blits / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup cost and blit throughput of the piece sprites")
+    parser.add_argument('--blits', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"import constants: {import_time('constants') * 1000:.1f} ms")
+    print(f"import board:     {import_time('board') * 1000:.1f} ms")
+    print(f"load 12 images:   {load_time() * 1000:.1f} ms (previously paid at import)")
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    square_size = SCREEN_SIZE[1] // 8
+
+    raw = {key: pygame.image.load(f"image/{color}_{name}.png") for key, (color, name) in pieces.items()}
+
+    def raw_blit(screen, key, rect):
+        screen.blit(raw[key], raw[key].get_rect(center=rect.center))
+
+    started = time.perf_counter()
+    cache = SpriteCache()
+    cache.prepare(square_size)
+    prepare_time = time.perf_counter() - started
+    atlas = SpriteCache(use_atlas=True)
+    atlas.prepare(square_size)
+
+    print(f"prepare sprites:  {prepare_time * 1000:.1f} ms (load, convert and scale)")
+    for name, blit in (('unconverted', raw_blit), ('converted', cache.blit), ('atlas', atlas.blit)):
+        print(f"{name:>12}: {bench_blits(screen, blit, args.blits):>9.0f} blits/s")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
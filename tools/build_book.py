@@ -0,0 +1,68 @@
+import argparse
+import time
+import chess
+import chess.pgn
+import chess.polyglot
+from AI.book import ENTRY, encode_move
+
+# Polyglot's usual weighting: 2 for a win and 1 for a draw, for the side that played the move.
+RESULT_POINTS = {'1-0': (2, 0), '0-1': (0, 2), '1/2-1/2': (1, 1)}
+
+
+def collect(paths, plies, scoring):
+    weights = {}
+    counts = {}
+    games = 0
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as pgn:
+            while True:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
+                    break
+                points = RESULT_POINTS.get(game.headers.get('Result'))
+                if scoring == 'results' and points is None:
+                    continue
+                games += 1
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= plies:
+                        break
+                    entry = (chess.polyglot.zobrist_hash(board), encode_move(board, move))
+                    counts[entry] = counts.get(entry, 0) + 1
+                    gained = 1 if scoring == 'count' else points[0 if board.turn == chess.WHITE else 1]
+                    weights[entry] = weights.get(entry, 0) + gained
+                    board.push(move)
+    return weights, counts, games
+
+
+def write_book(path, weights, counts, min_count):
+    entries = [(key, move, weight) for (key, move), weight in weights.items()
+               if counts[key, move] >= min_count and weight > 0]
+    # Weights are 16 bits; scale everything down if the top one does not fit.
+    top = max((weight for _, _, weight in entries), default=0)
+    scale = 65535 / top if top > 65535 else 1
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+    with open(path, 'wb') as book:
+        for key, move, weight in entries:
+            book.write(ENTRY.pack(key, move, max(1, int(weight * scale)), 0))
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from PGN files")
+    parser.add_argument('pgn', nargs='+')
+    parser.add_argument('--output', default='book.bin')
+    parser.add_argument('--plies', type=int, default=20, help="book moves taken from the start of each game")
+    parser.add_argument('--min-count', type=int, default=2, help="drop moves played fewer times than this")
+    parser.add_argument('--scoring', choices=('results', 'count'), default='results',
+                        help="weight moves by game results or by how often they were played")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    weights, counts, games = collect(args.pgn, args.plies, args.scoring)
+    written = write_book(args.output, weights, counts, args.min_count)
+    print(f"{games} games, {written} entries written to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import os
+import time
+import chess
+from AI.tablebase import (MATERIALS, TABLE_SUFFIX, MAGIC, VERSION, HEADER, POSITIONS, DRAW, LOSS, ILLEGAL,
+                          Tablebases, table_index)
+
+STRONG, WEAK = 0, 1
+BLOCKED = 255
+PROMOTIONS = (chess.QUEEN, chess.ROOK)
+
+
+def piece_attacks(piece_type, square, occupied):
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[chess.WHITE][square]
+    attacks = 0
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+        attacks |= chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+    if piece_type == chess.QUEEN:
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    return attacks
+
+
+def is_legal(piece_type, side, strong_king, weak_king, piece):
+    if len({strong_king, weak_king, piece}) < 3:
+        return False
+    if chess.BB_KING_ATTACKS[strong_king] & chess.BB_SQUARES[weak_king]:
+        return False
+    if piece_type == chess.PAWN and not 8 <= piece < 56:
+        return False
+    # The weak king may not be left in check with the strong side to move.
+    occupied = chess.BB_SQUARES[strong_king] | chess.BB_SQUARES[weak_king]
+    return side == WEAK or not piece_attacks(piece_type, piece, occupied) & chess.BB_SQUARES[weak_king]
+
+
+def weak_replies(piece_type, strong_king, weak_king, piece):
+    # Squares the weak king can step to, and whether it can take the piece.
+    guarded = chess.BB_KING_ATTACKS[strong_king] | piece_attacks(piece_type, piece, chess.BB_SQUARES[strong_king])
+    targets = chess.BB_KING_ATTACKS[weak_king] & ~guarded & ~chess.BB_SQUARES[strong_king]
+    return targets & ~chess.BB_SQUARES[piece], bool(targets & chess.BB_SQUARES[piece])
+
+
+def strong_origins(piece_type, strong_king, weak_king, piece):
+    # Positions, strong side to move, that reach this one with a quiet move.
+    occupied = chess.BB_SQUARES[strong_king] | chess.BB_SQUARES[weak_king] | chess.BB_SQUARES[piece]
+    king_from = chess.BB_KING_ATTACKS[strong_king] & ~occupied
+    for square in chess.scan_forward(king_from):
+        yield square, piece
+    if piece_type == chess.PAWN:
+        if piece >= 16 and not occupied & chess.BB_SQUARES[piece - 8]:
+            yield strong_king, piece - 8
+            if chess.square_rank(piece) == 3 and not occupied & chess.BB_SQUARES[piece - 16]:
+                yield strong_king, piece - 16
+        return
+    for square in chess.scan_forward(piece_attacks(piece_type, piece, occupied) & ~occupied):
+        yield strong_king, square
+
+
+def promotion_values(piece_type, strong_king, weak_king, piece, tables):
+    # Plies to mate after each winning promotion of a pawn on the seventh rank.
+    target = piece + 8
+    if piece_type != chess.PAWN or chess.square_rank(piece) != 6 or target in (strong_king, weak_king):
+        return []
+    values = []
+    for promotion in PROMOTIONS:
+        value = tables[promotion][table_index(False, strong_king, weak_king, target)]
+        if LOSS <= value < ILLEGAL:
+            values.append(value - LOSS + 1)
+    return values
+
+
+def generate(piece_type, tables):
+    # Retrograde analysis: start from the mates (and, for pawns, from the
+    # winning promotions) and walk backwards one ply at a time.
+    values = bytearray([ILLEGAL]) * POSITIONS
+    replies = bytearray(POSITIONS)
+    buckets = [[]]
+
+    def push(plies, index):
+        while len(buckets) <= plies:
+            buckets.append([])
+        buckets[plies].append(index)
+
+    squares = range(64)
+    for strong_king in squares:
+        for weak_king in squares:
+            for piece in squares:
+                for side in (STRONG, WEAK):
+                    if not is_legal(piece_type, side, strong_king, weak_king, piece):
+                        continue
+                    index = table_index(side == STRONG, strong_king, weak_king, piece)
+                    values[index] = DRAW
+                    if side == STRONG:
+                        for plies in promotion_values(piece_type, strong_king, weak_king, piece, tables):
+                            push(plies, index)
+                        continue
+                    targets, can_capture = weak_replies(piece_type, strong_king, weak_king, piece)
+                    if can_capture:
+                        replies[index] = BLOCKED
+                    elif targets:
+                        replies[index] = chess.popcount(targets)
+                    else:
+                        check = piece_attacks(piece_type, piece, chess.BB_SQUARES[strong_king]) & \
+                            chess.BB_SQUARES[weak_king]
+                        if check:
+                            values[index] = LOSS
+                            push(0, index)
+                        replies[index] = BLOCKED
+
+    plies = 0
+    while plies < len(buckets):
+        for index in buckets[plies]:
+            strong_king, weak_king, piece = index >> 12 & 63, index >> 6 & 63, index & 63
+            if index >> 18 == STRONG:
+                if values[index] != DRAW:
+                    continue
+                values[index] = plies
+                # The weak king stepped here from a neighbouring square.
+                for square in chess.scan_forward(chess.BB_KING_ATTACKS[weak_king]):
+                    if square in (strong_king, piece):
+                        continue
+                    origin = table_index(False, strong_king, square, piece)
+                    if replies[origin] == BLOCKED or values[origin] == ILLEGAL:
+                        continue
+                    replies[origin] -= 1
+                    if not replies[origin]:
+                        values[origin] = LOSS + plies + 1
+                        push(plies + 1, origin)
+            else:
+                for king, square in strong_origins(piece_type, strong_king, weak_king, piece):
+                    origin = table_index(True, king, weak_king, square)
+                    if values[origin] == DRAW:
+                        push(plies + 1, origin)
+        plies += 1
+    return values
+
+
+def write_table(path, piece_type, values):
+    with open(path, 'wb') as table:
+        table.write(HEADER.pack(MAGIC, VERSION, piece_type))
+        table.write(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate WDL/DTM tables for small endgames")
+    parser.add_argument('materials', nargs='*', help=f"any of {', '.join(MATERIALS)} (default: all)")
+    parser.add_argument('--output', default='tablebases')
+    args = parser.parse_args()
+    for name in args.materials:
+        if name not in MATERIALS:
+            parser.error(f"unknown material {name}")
+
+    os.makedirs(args.output, exist_ok=True)
+    # Pawn tables need the tables their promotions lead to.
+    materials = set(args.materials or MATERIALS)
+    if 'KPK' in materials:
+        materials |= {'KQK', 'KRK'}
+    tables = {}
+    for name in sorted(materials, key=lambda name: name == 'KPK'):
+        piece_type = MATERIALS[name]
+        path = os.path.join(args.output, name + TABLE_SUFFIX)
+        started = time.perf_counter()
+        values = generate(piece_type, tables)
+        write_table(path, piece_type, values)
+        tables[piece_type] = values
+        wins = sum(1 for value in values[:POSITIONS // 2] if DRAW < value < LOSS)
+        longest = max((value for value in values if DRAW < value < LOSS), default=0)
+        print(f"{name}: {wins} won positions with the strong side to move, longest mate {longest} plies, "
+              f"{time.perf_counter() - started:.1f}s -> {path}")
+    Tablebases(args.output).close()
+
+
+if __name__ == '__main__':
+    main()
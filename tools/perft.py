@@ -0,0 +1,250 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import sys
+import time
+import tracemalloc
+from board import Board
+from bitboard import square, square_name
+from piece import Piece, King
+
+PROMOTIONS = {'queen': 'q', 'rook': 'r', 'bishop': 'b', 'knight': 'n'}
+
+# (name, FEN, known node counts by depth)
+PERFT_SUITE = [
+    ('start', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', (20, 400, 8902, 197281)),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', (48, 2039, 97862)),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', (14, 191, 2812, 43238)),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', (6, 264, 9467)),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', (44, 1486, 62379)),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', (46, 2079, 89890)),
+]
+
+
+def is_promotion(board, from_x, from_y, to_y):
+    return board.board[from_y][from_x].piece_type == 'pawn' and to_y in (0, 7)
+
+
+def moves(board):
+    for (from_x, from_y), destinations in board.get_all_moves().items():
+        for to_x, to_y in destinations:
+            name = square_name(from_x, from_y) + square_name(to_x, to_y)
+            for piece_type in PROMOTIONS if is_promotion(board, from_x, from_y, to_y) else (None,):
+                yield name + PROMOTIONS.get(piece_type, ''), (from_x, from_y, to_x, to_y, piece_type)
+
+
+def count_moves(board):
+    total = 0
+    for (from_x, from_y), destinations in board.get_all_moves().items():
+        for to_x, to_y in destinations:
+            total += len(PROMOTIONS) if is_promotion(board, from_x, from_y, to_y) else 1
+    return total
+
+
+def perft(board, depth, rule_check=None):
+    if rule_check is not None:
+        rule_check(board)
+    if depth == 0:
+        return 1
+    if depth == 1 and rule_check is None:
+        return count_moves(board)
+    total = 0
+    for _, move in moves(board):
+        board.make_move(*move)
+        total += perft(board, depth - 1, rule_check)
+        board.unmake_move()
+    return total
+
+
+def copy_perft(board, depth):
+    # The copy-make walk the harness used before make/unmake, kept for comparison.
+    if depth == 0:
+        return 1
+    total = 0
+    for _, move in moves(board):
+        child = board.copy()
+        child.make_move(*move)
+        total += copy_perft(child, depth - 1)
+    return total
+
+
+def divide(board, depth):
+    counts = {}
+    for name, move in moves(board):
+        board.make_move(*move)
+        counts[name] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def piece_state(piece):
+    return {name: getattr(piece, name) for cls in type(piece).__mro__ for name in getattr(cls, '__slots__', ())}
+
+
+def check_piece_rules(board):
+    # The piece classes are the reference rules: they must agree with the
+    # bitboard generator and must not change a piece while validating.
+    castling_rights = board.castling_rights()
+    en_passant = board.en_passant_square()
+    for from_y, row in enumerate(board.board):
+        for from_x, piece in enumerate(row):
+            if piece is None:
+                continue
+            state = piece_state(piece)
+            if isinstance(piece, King):
+                # King rules already refuse attacked squares, so they match
+                # the generator's legal moves rather than its pseudo-moves.
+                expected = board.bitboards.legal_moves(square(from_x, from_y), castling_rights, en_passant)
+            else:
+                expected = board.bitboards.pseudo_moves(square(from_x, from_y), piece.color, piece.piece_type,
+                                                        castling_rights, en_passant)
+            for to_y in range(8):
+                for to_x in range(8):
+                    allowed = bool(piece.move(board, from_x, from_y, to_x, to_y))
+                    if allowed != bool(expected >> square(to_x, to_y) & 1):
+                        raise AssertionError(f"{piece.color} {piece.piece_type} "
+                                             f"{square_name(from_x, from_y)}{square_name(to_x, to_y)}: "
+                                             f"piece rules say {allowed}")
+            if piece_state(piece) != state:
+                raise AssertionError(f"{piece.color} {piece.piece_type} on {square_name(from_x, from_y)} "
+                                     f"was modified by move validation")
+
+
+def python_chess_perft(fen, depth):
+    import chess
+
+    def count(board, depth):
+        if depth == 1:
+            return board.legal_moves.count()
+        total = 0
+        for move in board.legal_moves:
+            board.push(move)
+            total += count(board, depth - 1)
+            board.pop()
+        return total
+
+    return count(chess.Board(fen), depth) if depth else 1
+
+
+def deep_size(value, seen):
+    # Bytes held by a value and everything it references that is not yet in seen.
+    if id(value) in seen or isinstance(value, (type, type(sys), type(deep_size))):
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif not isinstance(value, (str, bytes, bytearray, int, float)):
+        if hasattr(value, '__dict__'):
+            size += deep_size(vars(value), seen)
+        for name in getattr(type(value), '__slots__', ()):
+            if hasattr(value, name):
+                size += deep_size(getattr(value, name), seen)
+    return size
+
+
+def position_memory(board):
+    # Full per-Board footprint, split by representation. The square array is
+    # kept alongside the piece grid and the bitboards, not instead of them.
+    seen = set()
+    parts = {
+        'piece grid': deep_size(board.board, seen),
+        'square array': deep_size(board.squares, seen),
+        'bitboards': deep_size(board.bitboards, seen),
+    }
+    parts['other state'] = deep_size(vars(board), seen)
+    return parts
+
+
+piece_allocations = [0]
+
+
+def counting_new(cls, *args, **kwargs):
+    piece_allocations[0] += 1
+    return object.__new__(cls)
+
+
+def count_allocations(walk, board, depth):
+    # Counts piece objects created during the walk and the peak memory it holds.
+    created = piece_allocations[0]
+    tracemalloc.start()
+    nodes = walk(board, depth)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return nodes, piece_allocations[0] - created, peak
+
+
+def memory_report(name, fen, depth):
+    board = Board.from_fen(fen)
+    parts = position_memory(board)
+    print(f"{name:>10}: {sum(parts.values())} bytes per Board ("
+          + ', '.join(f"{part} {size}" for part, size in parts.items()) + ")")
+    for walk_name, walk in (('copy-make', copy_perft), ('make/unmake', perft)):
+        nodes, created, peak = count_allocations(walk, board, depth)
+        print(f"{walk_name:>22} depth {depth}: {created:>9} pieces allocated "
+              f"({created / nodes:.2f}/node), peak {peak / 1024:.0f} KiB")
+
+
+def run(name, fen, depth, expected=None, compare=False, check_rules=False):
+    board = Board.from_fen(fen)
+    started = time.perf_counter()
+    nodes = perft(board, depth, check_piece_rules if check_rules else None)
+    elapsed = time.perf_counter() - started
+    if expected is None and compare:
+        expected = python_chess_perft(fen, depth)
+    status = '' if expected is None else 'ok' if nodes == expected else f'FAIL (expected {expected})'
+    print(f"{name:>10} depth {depth}: {nodes:>9} nodes {elapsed:>8.2f}s {nodes / max(elapsed, 1e-9):>9.0f} moves/s  {status}")
+    return expected is None or nodes == expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft for the Board move generator")
+    parser.add_argument('--fen', help="position to count instead of the built-in suite")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--divide', action='store_true', help="print the node count below every root move")
+    parser.add_argument('--compare', action='store_true', help="check --fen counts against python-chess")
+    parser.add_argument('--check-rules', action='store_true',
+                        help="also check the piece classes against the generator at every node")
+    parser.add_argument('--memory', action='store_true',
+                        help="report memory per position and piece allocations of copy-make and make/unmake")
+    args = parser.parse_args()
+
+    if args.memory:
+        # Stays installed: CPython cannot restore object.__new__ once it is overridden.
+        Piece.__new__ = counting_new
+        for name, fen, _ in [('fen', args.fen, None)] if args.fen else PERFT_SUITE:
+            memory_report(name, fen, args.depth)
+        return
+
+    if args.fen and args.divide:
+        counts = divide(Board.from_fen(args.fen), args.depth)
+        reference = {}
+        if args.compare:
+            import chess
+            board = chess.Board(args.fen)
+            for move in board.legal_moves:
+                board.push(move)
+                reference[move.uci()] = python_chess_perft(board.fen(), args.depth - 1)
+                board.pop()
+        for name in sorted(set(counts) | set(reference)):
+            mismatch = '' if not reference or counts.get(name) == reference.get(name) else \
+                f'  expected {reference.get(name)}'
+            print(f"{name}: {counts.get(name)}{mismatch}")
+        print(f"total: {sum(counts.values())}")
+        return
+
+    if args.fen:
+        ok = run('fen', args.fen, args.depth, compare=args.compare, check_rules=args.check_rules)
+    else:
+        ok = True
+        for name, fen, known in PERFT_SUITE:
+            depth = min(args.depth, len(known))
+            ok = run(name, fen, depth, known[depth - 1], check_rules=args.check_rules) and ok
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from notation import NotationError, read_games, write_pgn
+
+GAME_START = b'[Event '
+
+
+def chunk_bounds(path, chunk_size):
+    # Byte ranges of roughly chunk_size, each moved forward to the start of a game.
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, 'rb') as pgn:
+        while bounds[-1] < size:
+            position = bounds[-1] + chunk_size
+            if position >= size:
+                break
+            pgn.seek(position)
+            pgn.readline()
+            while True:
+                position = pgn.tell()
+                line = pgn.readline()
+                if not line or line.startswith(GAME_START):
+                    break
+            if position >= size:
+                break
+            bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def chunk_lines(path, start, end):
+    with open(path, 'rb') as pgn:
+        pgn.seek(start)
+        while pgn.tell() < end:
+            line = pgn.readline()
+            if not line:
+                break
+            yield line.decode('utf-8', errors='replace')
+
+
+def replay_chunk(job):
+    # Replays every game of one chunk; FEN and PGN output come back as text
+    # so that the parent writes the chunks in file order.
+    path, start, end, want_fens, want_pgn = job
+    games = positions = 0
+    errors = []
+    fens = []
+    pgn = io.StringIO()
+    for game in read_games(chunk_lines(path, start, end)):
+        games += 1
+        try:
+            for board in game.positions():
+                positions += 1
+                if want_fens:
+                    fens.append(board.fen())
+            if want_pgn:
+                write_pgn(pgn, game)
+        except NotationError as error:
+            errors.append(f"{game.headers.get('White', '?')} - {game.headers.get('Black', '?')}: {error}")
+    return games, positions, errors, fens, pgn.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream PGN files through the board's move generator")
+    parser.add_argument('pgn')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=float, default=1.0, help="MB of PGN per worker job")
+    parser.add_argument('--fen', help="write the position after every move to this file")
+    parser.add_argument('--output', help="write the games back out as PGN to this file")
+    parser.add_argument('--show-errors', type=int, default=10, help="errors to print (the rest are counted)")
+    args = parser.parse_args()
+
+    bounds = chunk_bounds(args.pgn, max(1, int(args.chunk_size * 1024 * 1024)))
+    jobs = [(args.pgn, start, end, args.fen is not None, args.output is not None) for start, end in bounds]
+    fen_file = open(args.fen, 'w') if args.fen else None
+    pgn_file = open(args.output, 'w') if args.output else None
+    games = positions = shown = 0
+    error_count = 0
+    started = time.perf_counter()
+    pool = multiprocessing.Pool(args.workers) if args.workers > 1 else None
+    try:
+        results = pool.imap(replay_chunk, jobs) if pool is not None else map(replay_chunk, jobs)
+        for chunk_games, chunk_positions, errors, fens, pgn in results:
+            games += chunk_games
+            positions += chunk_positions
+            error_count += len(errors)
+            for error in errors[:max(0, args.show_errors - shown)]:
+                print(error)
+                shown += 1
+            if fen_file is not None:
+                fen_file.writelines(fen + '\n' for fen in fens)
+            if pgn_file is not None:
+                pgn_file.write(pgn)
+    finally:
+        if pool is not None:
+            pool.close()
+        for output in (fen_file, pgn_file):
+            if output is not None:
+                output.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{games} games, {positions} positions, {error_count} errors in {elapsed:.2f}s "
+          f"({games / max(elapsed, 1e-9):.1f} games/sec, {positions / max(elapsed, 1e-9):.0f} positions/sec, "
+          f"{len(jobs)} chunks, {args.workers} workers)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import chess
+from AI.minimax import Ai, parse_pruning
+
+
+def print_info(info):
+    print(f"depth {info['depth']:>2}/{info['seldepth']:<2} score {info['score']:>6} "
+          f"nodes {info['nodes']:>8} qnodes {info['quiescence_nodes']:>8} {info['nps']:>7} n/s "
+          f"{info['time']:>7.2f}s cutoffs {info['beta_cutoffs']:>6} first {info['first_move_cutoff_rate']:.2f} "
+          f"tt {info['tt_hits']}/{info['tt_probes']} pawn {info['pawn_hit_rate']:.1%} null {info['null_move_cutoffs']} lmr {info['reductions']} "
+          f"futile {info['futility_prunes'] + info['reverse_futility_cutoffs']} pv {' '.join(info['pv'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-iteration search statistics for one position")
+    parser.add_argument('--fen', default=chess.STARTING_FEN)
+    parser.add_argument('--depth', type=int)
+    parser.add_argument('--time', type=float, help="time limit in seconds")
+    parser.add_argument('--nodes', type=int, help="node limit")
+    parser.add_argument('--prune', type=parse_pruning, default='all',
+                        help="all, none or techniques joined by + (null_move, late_move_reductions, futility, "
+                             "reverse_futility)")
+    parser.add_argument('--cache', help="persistent analysis cache (SQLite) to read from and write to")
+    parser.add_argument('--json', help="write the statistics to this file")
+    args = parser.parse_args()
+
+    ai = Ai(pruning=args.prune, cache_path=args.cache)
+    ai.chess_board = chess.Board(args.fen)
+    best_move = ai.get_best_move(depth=args.depth, time_limit=args.time, node_limit=args.nodes,
+                                 info_callback=print_info)
+    print(f"best move: {best_move.uci() if best_move else None}")
+    if not ai.stats.iterations and best_move is not None:
+        print("(played without searching)")
+    ai.close()
+    if args.json:
+        ai.stats.dump(args.json)
+
+
+if __name__ == '__main__':
+    main()
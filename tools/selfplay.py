@@ -0,0 +1,175 @@
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+import chess
+import chess.pgn
+from AI.minimax import Ai, DEFAULT_TT_SIZE_MB, PRUNING, parse_pruning
+
+ENGINE_OPTIONS = {'depth': int, 'time': float, 'nodes': int, 'hash': float, 'book': str, 'tablebases': str,
+                  'prune': parse_pruning}
+worker_engines = {}
+
+
+def parse_engine(spec):
+    # "name:depth=4,time=0.5"; every option is optional.
+    name, _, options = spec.partition(':')
+    config = {'name': name}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        if key not in ENGINE_OPTIONS:
+            raise argparse.ArgumentTypeError(f"unknown engine option {key}")
+        try:
+            config[key] = ENGINE_OPTIONS[key](value)
+        except ValueError as error:
+            raise argparse.ArgumentTypeError(f"{key}: {error}")
+    if not any(key in config for key in ('depth', 'time', 'nodes')):
+        config['depth'] = 3
+    return config
+
+
+def engine(config):
+    # One Ai per configuration and pool process, so its tables stay warm.
+    key = tuple(sorted(config.items()))
+    if key not in worker_engines:
+        worker_engines[key] = Ai(config.get('hash', DEFAULT_TT_SIZE_MB), book_path=config.get('book'),
+                                 tablebase_path=config.get('tablebases'), pruning=config.get('prune', PRUNING))
+    return worker_engines[key]
+
+
+def play_game(job):
+    round_number, white, black, opening, max_plies = job
+    board = chess.Board(opening)
+    engines = {chess.WHITE: white, chess.BLACK: black}
+    termination = None
+    while not board.is_game_over(claim_draw=True):
+        if board.ply() >= max_plies:
+            termination = 'max plies'
+            break
+        config = engines[board.turn]
+        ai = engine(config)
+        ai.chess_board = board.copy()
+        move = ai.get_best_move(depth=config.get('depth'), time_limit=config.get('time'),
+                                node_limit=config.get('nodes'))
+        if move is None:
+            break
+        board.push(move)
+
+    result = board.result(claim_draw=True) if termination is None else '1/2-1/2'
+    game = chess.pgn.Game.from_board(board)
+    game.headers['Event'] = 'Self-play'
+    game.headers['Date'] = time.strftime('%Y.%m.%d')
+    game.headers['Round'] = str(round_number)
+    game.headers['White'] = white['name']
+    game.headers['Black'] = black['name']
+    game.headers['Result'] = result
+    if termination is not None:
+        game.headers['Termination'] = termination
+    return white['name'], black['name'], result, str(game)
+
+
+def opening_lines(path, count, random_plies, seed):
+    if path is not None:
+        with open(path) as openings:
+            fens = [' '.join(line.split()[:4]) + ' 0 1' for line in openings if line.strip()]
+        return [fens[index % len(fens)] for index in range(count)]
+    # Short random openings keep deterministic engines from replaying one game.
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        board = chess.Board()
+        for _ in range(random_plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        lines.append(board.fen())
+    return lines
+
+
+def schedule(engines, games, openings_path, random_plies, max_plies, seed):
+    # Every pairing plays each opening twice, once with each colour.
+    jobs = []
+    pairs = list(itertools.combinations(engines, 2))
+    openings = opening_lines(openings_path, (games + 1) // 2, random_plies, seed)
+    # With an odd count the last opening is played once per pairing.
+    played = [0] * len(pairs)
+    for opening in openings:
+        for index, (first, second) in enumerate(pairs):
+            for white, black in ((first, second), (second, first)):
+                if played[index] < games:
+                    played[index] += 1
+                    jobs.append((len(jobs) + 1, white, black, opening, max_plies))
+    return jobs
+
+
+def elo(score):
+    if score <= 0:
+        return float('-inf')
+    if score >= 1:
+        return float('inf')
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_interval(wins, draws, losses, z=1.96):
+    # Elo difference and its 95% interval from the per-game score variance.
+    games = wins + draws + losses
+    if not games:
+        return 0.0, float('-inf'), float('inf')
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = z * math.sqrt(variance / games)
+    return elo(score), elo(score - margin), elo(score + margin)
+
+
+def report(results, elapsed):
+    games = sum(sum(counts) for counts in results.values())
+    print(f"{games} games in {elapsed:.1f}s ({games * 3600 / max(elapsed, 1e-9):.0f} games/hour)")
+    for (first, second), (wins, draws, losses) in sorted(results.items()):
+        difference, low, high = elo_interval(wins, draws, losses)
+        total = wins + draws + losses
+        print(f"{first} vs {second}: +{wins} ={draws} -{losses}  score {(wins + draws / 2) / total:.3f}  "
+              f"Elo {difference:+.0f} [{low:+.0f}, {high:+.0f}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine matches")
+    parser.add_argument('--engine', action='append', type=parse_engine, required=True,
+                        help="name:option=value,... with options " + ', '.join(ENGINE_OPTIONS))
+    parser.add_argument('--games', type=int, default=100, help="games per pairing")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--pgn', default='selfplay.pgn')
+    parser.add_argument('--openings', help="file of FENs/EPDs to start games from")
+    parser.add_argument('--random-plies', type=int, default=4, help="random opening plies without --openings")
+    parser.add_argument('--max-plies', type=int, default=400, help="adjudicate a draw after this many plies")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if len(args.engine) < 2:
+        parser.error("at least two --engine configurations are needed")
+    if len({config['name'] for config in args.engine}) != len(args.engine):
+        parser.error("engine names must be unique")
+
+    jobs = schedule(args.engine, args.games, args.openings, args.random_plies, args.max_plies, args.seed)
+    names = [config['name'] for config in args.engine]
+    results = {}
+    started = time.perf_counter()
+    with open(args.pgn, 'w') as pgn, multiprocessing.Pool(max(1, args.workers)) as pool:
+        for finished, (white, black, result, game) in enumerate(pool.imap_unordered(play_game, jobs), 1):
+            pgn.write(game + '\n\n')
+            pgn.flush()
+            # Results are kept from the point of view of the engine listed first.
+            first, second = sorted((white, black), key=names.index)
+            points = {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+            if first != white:
+                points = 1 - points
+            counts = results.setdefault((first, second), [0, 0, 0])
+            counts[0 if points == 1 else 1 if points == 0.5 else 2] += 1
+            print(f"game {finished}/{len(jobs)}: {white} - {black} {result}", flush=True)
+    report(results, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+import chess
+from AI.minimax import Ai, PRUNING, parse_pruning
+
+SUITE = os.path.join(os.path.dirname(__file__), 'tactics.epd')
+
+
+def load_suite(path):
+    positions = []
+    with open(path) as suite:
+        for line in suite:
+            if line.strip() and not line.startswith('#'):
+                board, operations = chess.Board.from_epd(line)
+                positions.append((operations.get('id', board.fen()), board, operations.get('bm', []),
+                                  operations.get('am', [])))
+    return positions
+
+
+def run_suite(positions, pruning, depth, time_limit, verbose):
+    solved = nodes = 0
+    started = time.perf_counter()
+    for name, board, best_moves, avoid_moves in positions:
+        ai = Ai(pruning=pruning)
+        ai.chess_board = board.copy()
+        move = ai.get_best_move(depth=depth, time_limit=time_limit)
+        nodes += ai.stats.nodes
+        correct = move is not None and (move in best_moves if best_moves else move not in avoid_moves)
+        solved += correct
+        if verbose:
+            expected = ' '.join(board.san(move) for move in best_moves) or \
+                'not ' + ' '.join(board.san(move) for move in avoid_moves)
+            print(f"{name:<10} {'ok ' if correct else 'bad'} played {board.san(move) if move else '-':<7} "
+                  f"expected {expected:<12} nodes {ai.stats.nodes}")
+    return solved, nodes, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve rate of the search on an EPD suite of bm/am positions")
+    parser.add_argument('epd', nargs='?', default=SUITE)
+    parser.add_argument('--depth', type=int)
+    parser.add_argument('--time', type=float, help="seconds per position")
+    parser.add_argument('--prune', type=parse_pruning, default=PRUNING,
+                        help="all, none or techniques joined by + (default: all)")
+    parser.add_argument('--compare', action='store_true', help="run with pruning off and then as given by --prune")
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+    if args.depth is None and args.time is None:
+        args.depth = 4
+
+    positions = load_suite(args.epd)
+    configurations = [(), args.prune] if args.compare else [args.prune]
+    for pruning in configurations:
+        label = '+'.join(pruning) or 'none'
+        if not args.quiet:
+            print(f"pruning: {label}")
+        solved, nodes, elapsed = run_suite(positions, pruning, args.depth, args.time, not args.quiet)
+        print(f"{label}: solved {solved}/{len(positions)}, {nodes} nodes, {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY
+from bitboard import PAWN_ATTACKS, PIECE_TYPES, coords, iter_squares, other
+
+# Keys follow the Polyglot layout, so a Board key equals
+# chess.polyglot.zobrist_hash() of the same position in the engine.
+PIECE_KEYS = {
+    (color, piece_type): [
+        POLYGLOT_RANDOM_ARRAY[64 * (2 * kind + (color == 'white')) + 8 * (7 - (sq >> 3)) + (sq & 7)]
+        for sq in range(64)
+    ]
+    for kind, piece_type in enumerate(PIECE_TYPES)
+    for color in ('white', 'black')
+}
+CASTLING_KEYS = {63: POLYGLOT_RANDOM_ARRAY[768], 56: POLYGLOT_RANDOM_ARRAY[769],
+                 7: POLYGLOT_RANDOM_ARRAY[770], 0: POLYGLOT_RANDOM_ARRAY[771]}
+EN_PASSANT_KEYS = POLYGLOT_RANDOM_ARRAY[772:780]
+TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]
+
+
+def piece_key(color, piece_type, sq):
+    return PIECE_KEYS[color, piece_type][sq]
+
+
+def castling_key(castling_rights):
+    key = 0
+    for sq in iter_squares(castling_rights):
+        key ^= CASTLING_KEYS.get(sq, 0)
+    return key
+
+
+def en_passant_key(en_passant, bitboards, color):
+    if en_passant is None or not PAWN_ATTACKS[other(color)][en_passant] & bitboards.pieces[color]['pawn']:
+        return 0
+    return EN_PASSANT_KEYS[coords(en_passant)[0]]
+
+
+def state_key(castling_rights, en_passant, bitboards, color):
+    key = castling_key(castling_rights) ^ en_passant_key(en_passant, bitboards, color)
+    return key ^ TURN_KEY if color == 'white' else key
+
+
+def position_key(bitboards, castling_rights, en_passant, color):
+    key = state_key(castling_rights, en_passant, bitboards, color)
+    for piece_color, pieces in bitboards.pieces.items():
+        for piece_type, bb in pieces.items():
+            for sq in iter_squares(bb):
+                key ^= PIECE_KEYS[piece_color, piece_type][sq]
+    return key